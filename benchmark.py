@@ -0,0 +1,304 @@
+# python standard libraries imports
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import OrderedDict
+
+# import numpy
+try:
+    import numpy as np
+except:
+    raise Exception("numpy library is not installed.")
+
+# import engine
+try:
+    from engine import GET_SCEDASTICITY_CORRELATION, GET_SCEDASTICITY_MAP, GET_SCEDASTICITY_MAP_CHUNKED
+    from engine import GET_SCEDASTICITY_MAP_PARALLEL, GET_SCEDASTICITY_INTERVALS_CUBE, GET_SCEDASTICITY_SCALE_SPACE
+    from engine import GET_NORMALIZED_DATA, GET_LAGS_CORRELATION, GET_SELECTED_DATA, GET_NAN_LIMITS
+    from engine import IndexSelection, ImagePyramid, GET_WINDOWED_NORMS, GET_SHOWN_REGION
+    from engine import READ_VECTOR_FILES, SpectraCache, WALL_TIME
+except:
+    raise Exception("scedasticity 'engine.py' is missing")
+
+# import matplotlib agg backend, rendering is not benchmarked without it
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+except:
+    Figure = None
+
+
+def GET_SYNTHETIC_SPECTRA(nfiles, npoints, peaks=6, noise=0.01, transitions=2, seed=0):
+    # ranked spectra of gaussian peaks drifting with the files index and
+    # gaussian noise. At every phase transition one peak disappears and a new
+    # one appears somewhere else. Returns x and float32 (nfiles, npoints) spectra.
+    random = np.random.RandomState(seed)
+    x      = np.linspace(0, 10, npoints)
+    ranks  = np.linspace(0, 1, nfiles)[:,None]
+    # peaks centers drift linearly and oscillate slowly along ranks
+    centers    = random.uniform(1, 9, peaks)
+    drifts     = random.uniform(-0.5, 0.5, peaks)
+    widths     = random.uniform(0.02, 0.15, peaks)
+    amplitudes = random.uniform(0.2, 1.0, peaks)
+    phases     = random.uniform(0, 2*np.pi, peaks)
+    positions  = centers + drifts*ranks + 0.05*np.sin(6*np.pi*ranks+phases)
+    # phase transitions move one peak at a given rank
+    for t in sorted(random.uniform(0.1, 0.9, transitions)):
+        k = random.randint(peaks)
+        positions[ranks[:,0]>=t, k] = random.uniform(1, 9)
+    spectra = np.zeros((nfiles, npoints), dtype=np.float64)
+    for k in range(peaks):
+        spectra += amplitudes[k]*np.exp(-0.5*((x[None,:]-positions[:,k:k+1])/widths[k])**2)
+    spectra += noise*random.standard_normal(spectra.shape)
+    return x, spectra.astype(np.float32)
+
+
+def GET_DIFFRACTION_SPECTRA(nfiles, npoints, peaks=30, background=10., amplitude=1e6, seed=0):
+    # high dynamic range spectra of narrow bragg peaks over a low noisy
+    # background, peaks being in the first half of points only. Windowed sums
+    # of the background tail must not be spoiled by the peaks ones.
+    random  = np.random.RandomState(seed)
+    points  = np.arange(npoints)
+    centers = random.uniform(0, npoints//2, peaks)
+    spectra = background*(1+0.1*random.standard_normal((nfiles, npoints)))
+    for center in centers:
+        spectra += amplitude*np.exp(-0.5*((points[None,:]-center-random.uniform(-1,1,(nfiles,1)))/2.)**2)
+    return points, spectra.astype(np.float32)
+
+
+def WRITE_SPECTRA_FILES(x, spectra, directory, extension=".chi"):
+    # write every spectrum in a two columns text file, returns files paths
+    files = []
+    for idx in range(len(spectra)):
+        path = os.path.join(directory, "spectrum_%06i%s"%(idx, extension))
+        np.savetxt(path, np.column_stack((x, spectra[idx])), fmt="%.8e")
+        files.append(path)
+    return files
+
+
+def REFERENCE_SCEDASTICITY_CORRELATION(y0, y1, halfwindow):
+    # original window by window scedasticity correlation loop computed in
+    # float64. Accelerated kernels are checked against it.
+    y0   = np.asarray(y0, dtype=np.float64)
+    y1   = np.asarray(y1, dtype=np.float64)
+    corr = np.nan*np.zeros(len(y0))
+    for idx in range(halfwindow, len(y0)-halfwindow, 1):
+        w0 = y0[idx-halfwindow:idx+halfwindow+1]
+        w1 = y1[idx-halfwindow:idx+halfwindow+1]
+        corr[idx] = np.dot(w0, w1)/(np.linalg.norm(w0)*np.linalg.norm(w1))
+    return corr
+
+
+def REFERENCE_CORRELATION(data, interval):
+    # original pearson correlation loop between every file idx and file idx+interval
+    data = np.asarray(data, dtype=np.float64)
+    correlation = []
+    for idx in range(len(data)-interval):
+        y0 = data[idx]-np.mean(data[idx])
+        y1 = data[idx+interval]-np.mean(data[idx+interval])
+        correlation.append( np.sum(y0*y1)/np.sqrt(np.sum(y0**2)*np.sum(y1**2)) )
+    return np.array(correlation)
+
+
+def GET_TIMING(function, repeat=3):
+    # best and mean wall time of calling function repeat times, and last result
+    times = []
+    for _ in range(repeat):
+        start  = WALL_TIME()
+        result = function()
+        times.append(WALL_TIME()-start)
+    return min(times), sum(times)/len(times), result
+
+
+def GET_VERSIONS():
+    # versions of the benchmarked environment and source
+    versions = OrderedDict()
+    versions["python"]   = platform.python_version()
+    versions["numpy"]    = np.__version__
+    versions["platform"] = platform.platform()
+    versions["cpus"]     = os.cpu_count() if hasattr(os, "cpu_count") else None
+    if Figure is not None:
+        versions["matplotlib"] = matplotlib.__version__
+    try:
+        versions["commit"] = subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                                     cwd=os.path.dirname(os.path.abspath(__file__)),
+                                                     stderr=subprocess.STDOUT).decode().strip()
+    except Exception:
+        versions["commit"] = None
+    return versions
+
+
+def RENDER_IMAGE(data, limits):
+    # render data image on an offscreen agg canvas the way scedasticity plots do
+    figure = Figure(figsize=(8,6), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    axes   = figure.add_subplot(111)
+    # shown image is the data resolution level matching axes pixels
+    image, region = ImagePyramid(data).get_view(rows=(0, data.shape[0]), columns=(0, data.shape[1]),
+                                                height=axes.bbox.height, width=axes.bbox.width)
+    axes.imshow(image, vmin=limits[0], vmax=limits[1], aspect="auto", origin="lower", cmap="jet",
+                extent=(region[2]-0.5, region[3]-0.5, region[0]-0.5, region[1]-0.5))
+    canvas.draw()
+    return figure
+
+
+def CHECK_KERNELS(nfiles=40, npoints=400, interval=2, window=25, workers=2, tolerance=1e-5):
+    # compare every accelerated kernel output to the reference loop output.
+    # Returns a list of checks dictionaries.
+    _, data    = GET_SYNTHETIC_SPECTRA(nfiles, npoints, seed=1)
+    halfwindow = int(window/2)
+    checks     = []
+    # check kernels on synthetic and high dynamic range spectra
+    for suffix, spectra in [("", data), (" high dynamic range", GET_DIFFRACTION_SPECTRA(6, 20*npoints, seed=1)[1])]:
+        nspectra  = len(spectra)
+        reference = np.vstack([REFERENCE_SCEDASTICITY_CORRELATION(spectra[idx], spectra[idx+interval], halfwindow) for idx in range(nspectra-interval)])
+        kernels   = OrderedDict()
+        kernels["GET_SCEDASTICITY_CORRELATION"]    = lambda: np.vstack([GET_SCEDASTICITY_CORRELATION(spectra[idx], spectra[idx+interval], halfwindow) for idx in range(nspectra-interval)])
+        kernels["GET_SCEDASTICITY_MAP"]            = lambda: GET_SCEDASTICITY_MAP(spectra, interval, halfwindow)
+        kernels["GET_SCEDASTICITY_MAP_CHUNKED"]    = lambda: GET_SCEDASTICITY_MAP_CHUNKED(spectra, interval, halfwindow, memoryBudget=64*spectra.shape[1]*5)[0]
+        kernels["GET_SCEDASTICITY_MAP_PARALLEL"]   = lambda: GET_SCEDASTICITY_MAP_PARALLEL(spectra, interval, halfwindow, workers=workers)[0]
+        kernels["GET_SCEDASTICITY_MAP_CHUNKED norms"]  = lambda: GET_SCEDASTICITY_MAP_CHUNKED(spectra, interval, halfwindow, memoryBudget=64*spectra.shape[1]*5,
+                                                                                             norms=GET_WINDOWED_NORMS(spectra, halfwindow))[0]
+        kernels["GET_SCEDASTICITY_MAP_PARALLEL norms"] = lambda: GET_SCEDASTICITY_MAP_PARALLEL(spectra, interval, halfwindow, workers=workers,
+                                                                                              norms=GET_WINDOWED_NORMS(spectra, halfwindow))[0]
+        kernels["GET_SCEDASTICITY_INTERVALS_CUBE"] = lambda: GET_SCEDASTICITY_INTERVALS_CUBE(spectra, [1, interval], halfwindow)[1,:nspectra-interval]
+        kernels["GET_SCEDASTICITY_SCALE_SPACE"]    = lambda: GET_SCEDASTICITY_SCALE_SPACE(spectra, interval, [1, halfwindow])[1]
+        for name, kernel in kernels.items():
+            checks.append( GET_CHECK(name+suffix, reference, kernel(), tolerance) )
+        if spectra is data:
+            limits = GET_NAN_LIMITS(reference)
+    # check correlation
+    correlation = GET_LAGS_CORRELATION(GET_NORMALIZED_DATA(data), [interval])[0]
+    checks.append( GET_CHECK("GET_LAGS_CORRELATION", REFERENCE_CORRELATION(data, interval), correlation, tolerance) )
+    # check running limits
+    for name, kernel in [("GET_SCEDASTICITY_MAP_CHUNKED limits", GET_SCEDASTICITY_MAP_CHUNKED),
+                         ("GET_SCEDASTICITY_MAP_PARALLEL limits", lambda *args: GET_SCEDASTICITY_MAP_PARALLEL(*args, workers=workers))]:
+        checks.append( GET_CHECK(name, np.array(limits), np.array(kernel(data, interval, halfwindow)[1:]), tolerance) )
+    # check running limits when a chunk of rows is all nan
+    zeroed = np.array(data)
+    zeroed[:nfiles//2] = 0
+    limits = GET_NAN_LIMITS(GET_SCEDASTICITY_MAP(zeroed, interval, halfwindow))
+    for name, kernel in [("GET_SCEDASTICITY_MAP_CHUNKED nan chunk limits", lambda *args: GET_SCEDASTICITY_MAP_CHUNKED(*args, memoryBudget=64*npoints*5)),
+                         ("GET_SCEDASTICITY_MAP_PARALLEL nan chunk limits", lambda *args: GET_SCEDASTICITY_MAP_PARALLEL(*args, workers=workers))]:
+        checks.append( GET_CHECK(name, np.array(limits), np.array(kernel(zeroed, interval, halfwindow)[1:]), tolerance) )
+    # check shown region of full views, which use cached data limits, and of a zoomed view
+    shape = data.shape
+    for name, xlimits, ylimits, region in [("GET_SHOWN_REGION full view", (-0.5, shape[1]-0.5), (-0.5, shape[0]-0.5), (0, shape[0], 0, shape[1])),
+                                           ("GET_SHOWN_REGION truncated full view", (0, shape[1]-1), (0, shape[0]-1), (0, shape[0], 0, shape[1])),
+                                           ("GET_SHOWN_REGION upper origin full view", (-0.5, shape[1]-0.5), (shape[0]-0.5, -0.5), (0, shape[0], 0, shape[1])),
+                                           ("GET_SHOWN_REGION zoomed view", (10.2, 20.7), (3.6, 8.4), (4, 9, 10, 22))]:
+        checks.append( GET_CHECK(name, np.array(region, dtype=np.float64), np.array(GET_SHOWN_REGION(shape, xlimits, ylimits)), 0.) )
+    return checks
+
+
+def GET_CHECK(name, reference, output, tolerance):
+    # check output has the reference shape and nan positions and is within tolerance
+    check = OrderedDict([("kernel",name), ("passed",False), ("maximumError",None), ("tolerance",tolerance)])
+    output = np.asarray(output, dtype=np.float64)
+    if output.shape != reference.shape:
+        check["error"] = "shape %s is not reference shape %s"%(output.shape, reference.shape)
+        return check
+    if not np.array_equal(np.isnan(output), np.isnan(reference)):
+        check["error"] = "nan positions are not reference ones"
+        return check
+    valid = ~np.isnan(reference)
+    if np.any(valid):
+        check["maximumError"] = float(np.max(np.abs(output[valid]-reference[valid])))
+    else:
+        check["maximumError"] = 0.
+    check["passed"] = check["maximumError"] <= tolerance
+    return check
+
+
+def RUN_BENCHMARKS(sizes, interval=1, window=25, repeat=3, workers=1, load=True):
+    # time every stage at every (number of files, number of points) size.
+    # Returns a list of results dictionaries.
+    results    = []
+    halfwindow = int(window/2)
+    for nfiles, npoints in sizes:
+        x, data = GET_SYNTHETIC_SPECTRA(nfiles, npoints)
+        stages  = OrderedDict()
+        # loading
+        if load:
+            directory = tempfile.mkdtemp(prefix="scedasticity_benchmark_")
+            try:
+                files = WRITE_SPECTRA_FILES(x, data, directory)
+                read  = lambda cache=None: [r for r in READ_VECTOR_FILES(files, workers=workers, cache=cache, comment="#", delimiter=None, headerLines=0, footerLines=0, useColumn=1)]
+                stages["load"] = GET_TIMING(read, repeat)
+                cache = SpectraCache(os.path.join(directory, "cache"), 1024**3)
+                read(cache)
+                stages["load cached"] = GET_TIMING(lambda: read(cache), repeat)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        # selection of every other file in the middle half of points
+        rows    = np.arange(0, nfiles, 2)
+        columns = np.arange(npoints//4, 3*npoints//4)
+        stages["selection"] = GET_TIMING(lambda: GET_SELECTED_DATA(data, rows=rows, columns=columns), repeat)
+        # same selection of evenly spaced indexes given as slices
+        select = lambda: GET_SELECTED_DATA(data, rows=IndexSelection(range(0, nfiles, 2)).get_index(nfiles),
+                                           columns=IndexSelection(range(npoints//4, 3*npoints//4)).get_index(npoints))
+        stages["selection slices"] = GET_TIMING(select, repeat)
+        # correlation
+        stages["correlation"] = GET_TIMING(lambda: GET_LAGS_CORRELATION(GET_NORMALIZED_DATA(data), [interval]), repeat)
+        # scedasticity
+        if workers > 1:
+            stages["scedasticity"] = GET_TIMING(lambda: GET_SCEDASTICITY_MAP_PARALLEL(data, interval, halfwindow, workers=workers), repeat)
+            scedasticity, dMin, dMax = stages["scedasticity"][2]
+        else:
+            stages["scedasticity"] = GET_TIMING(lambda: GET_SCEDASTICITY_MAP(data, interval, halfwindow), repeat)
+            scedasticity = stages["scedasticity"][2]
+            dMin, dMax   = GET_NAN_LIMITS(scedasticity)
+        # rendering
+        if Figure is not None:
+            stages["render"] = GET_TIMING(lambda: RENDER_IMAGE(scedasticity, (dMin, dMax)), repeat)
+        for stage, (best, mean, _) in stages.items():
+            results.append( OrderedDict([("files",nfiles), ("points",npoints), ("stage",stage),
+                                         ("best",best), ("mean",mean), ("repeat",repeat),
+                                         ("workers",workers), ("interval",interval), ("window",window)]) )
+            sys.stderr.write("%8i files %8i points  %-16s best %10.4f s  mean %10.4f s\n"%(nfiles, npoints, stage, best, mean))
+    return results
+
+
+def GET_SIZES(sizes):
+    # parse comma separated FILESxPOINTS sizes (e.g. 100x1000,1000x5000)
+    return [tuple([int(v) for v in s.lower().split("x")]) for s in sizes.split(",") if len(s.strip())]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scedasticity benchmark and kernels correctness suite. Results are written as json.")
+    parser.add_argument("--sizes", default="100x1000,500x2000,1000x5000", help="comma separated FILESxPOINTS sizes")
+    parser.add_argument("--interval", type=int, default=1, help="files interval")
+    parser.add_argument("--window", type=int, default=25, help="scedasticity window size")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timings of every stage")
+    parser.add_argument("--workers", type=int, default=1, help="number of reading and computation processes")
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="kernels maximum absolute error")
+    parser.add_argument("--no-load", action="store_true", help="don't benchmark files loading")
+    parser.add_argument("--check-only", action="store_true", help="only check kernels correctness")
+    parser.add_argument("--output", default=None, help="json output file, standard output when not given")
+    args = parser.parse_args()
+    # check kernels then benchmark
+    checks  = CHECK_KERNELS(interval=max(args.interval,1), window=args.window, workers=max(args.workers,2), tolerance=args.tolerance)
+    results = []
+    if not args.check_only:
+        results = RUN_BENCHMARKS(GET_SIZES(args.sizes), interval=args.interval, window=args.window,
+                                 repeat=args.repeat, workers=args.workers, load=not args.no_load)
+    report = OrderedDict([("versions",GET_VERSIONS()), ("checks",checks), ("benchmarks",results)])
+    report = json.dumps(report, indent=1)
+    if args.output is None:
+        sys.stdout.write(report+"\n")
+    else:
+        with open(args.output, 'w') as fd:
+            fd.write(report)
+    # fail when a kernel is not correct
+    for check in checks:
+        if not check["passed"]:
+            sys.stderr.write("kernel %s check failed. %s\n"%(check["kernel"], check.get("error", "maximum error %s"%check["maximumError"])))
+    if not all([check["passed"] for check in checks]):
+        sys.exit(1)
@@ -0,0 +1,1205 @@
+# python standard libraries imports
+import os
+import sys
+import ast
+import csv
+import json
+import time
+import fnmatch
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+# import shared memory, available since python 3.8
+try:
+    from multiprocessing import shared_memory
+except:
+    shared_memory = None
+
+# import memory tracing, available since python 3.4
+try:
+    import tracemalloc
+except:
+    tracemalloc = None
+
+# import process resources, available on unix only
+try:
+    import resource
+except:
+    resource = None
+
+# wall and cpu clocks
+WALL_TIME = getattr(time, "perf_counter", time.time)
+CPU_TIME  = getattr(time, "process_time", time.clock if hasattr(time, "clock") else time.time)
+
+# import numpy
+try:
+    import numpy as np
+except:
+    raise Exception("numpy library is not installed.")
+
+
+# scedasticity pool worker process shared arrays
+_WORKER_ARRAYS = {}
+
+
+def GET_WINDOW_SUMS(data, window):
+    # float64 sums of every 'window' consecutive values along data last axis.
+    # Data are split in blocks of window values and every window sum is a
+    # block suffix sum plus the next block prefix sum, so only values inside
+    # the window are added. Unlike differences of running sums, big values
+    # out of a window don't cancel the small ones inside it.
+    data    = np.asarray(data)
+    shape   = data.shape[:-1]
+    npoints = data.shape[-1]
+    nsums   = max(npoints-window+1, 0)
+    nblocks = -(-npoints//window)
+    # last block is padded with zeros
+    if nblocks*window == npoints:
+        blocks = np.asarray(data, dtype=np.float64).reshape(shape+(nblocks, window))
+    else:
+        blocks = np.zeros(shape+(nblocks, window), dtype=np.float64)
+        blocks.reshape(shape+(-1,))[...,:npoints] = data
+    prefix  = np.cumsum(blocks, axis=-1).reshape(shape+(-1,))
+    suffix  = np.empty(blocks.shape, dtype=np.float64)
+    np.cumsum(blocks[...,::-1], axis=-1, out=suffix[...,::-1])
+    sums    = suffix.reshape(shape+(-1,))[...,:nsums]
+    # windows starting a block are the block suffix
+    prefix  = prefix[...,window-1:window-1+nsums]
+    prefix[...,::window] = 0
+    sums   += prefix
+    return sums
+
+
+def GET_NAN_LIMITS(data, limits=None):
+    # data minimum and maximum ignoring nan in one pass each and without
+    # copying data. When limits (minimum, maximum) are given they are updated
+    # with data ones, which allows to collect limits of rows as they are
+    # computed. Limits of data with no values are (inf, -inf).
+    if limits is None:
+        limits = (np.inf, -np.inf)
+    data = np.asarray(data)
+    if not data.size:
+        return limits
+    data = data.reshape(-1)
+    return ( float(np.fmin(limits[0], np.fmin.reduce(data))),
+             float(np.fmax(limits[1], np.fmax.reduce(data))) )
+
+
+def GET_DECIMATED_DATA(data, rowFactor, columnFactor, method="mean", memoryBudget=64*1024**2):
+    # float32 mean, min or max of every rowFactor x columnFactor block of 2D
+    # data ignoring nan. Trailing rows and columns not filling a block are
+    # dropped. Data are read by chunks of rows using up to memoryBudget bytes,
+    # which allows to decimate memory mapped data.
+    assert method in ("mean", "min", "max"), "method must be 'mean', 'min' or 'max'"
+    nrows, ncolumns = data.shape[0]//rowFactor, data.shape[1]//columnFactor
+    out  = np.empty((nrows, ncolumns), dtype=np.float32)
+    rows = max(1, int(memoryBudget/(8*rowFactor*columnFactor*max(ncolumns,1))))
+    for start in range(0, nrows, rows):
+        stop   = min(start+rows, nrows)
+        blocks = np.asarray(data[start*rowFactor:stop*rowFactor, :ncolumns*columnFactor], dtype=np.float32)
+        blocks = blocks.reshape((stop-start, rowFactor, ncolumns, columnFactor))
+        if method == "min":
+            out[start:stop] = np.fmin.reduce(blocks, axis=(1,3))
+        elif method == "max":
+            out[start:stop] = np.fmax.reduce(blocks, axis=(1,3))
+        else:
+            valid  = ~np.isnan(blocks)
+            sums   = np.where(valid, blocks, 0).sum(axis=(1,3))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[start:stop] = sums/valid.sum(axis=(1,3))
+    return out
+
+
+def GET_SHOWN_REGION(shape, xlimits, ylimits):
+    # data region (rowStart, rowStop, columnStart, columnStop) shown by axes
+    # x and y limits of an image of data shape drawn with extent
+    # (-0.5, columns-0.5, -0.5, rows-0.5). Partially shown rows and columns
+    # are included and region is clipped to data shape.
+    xlimits = sorted(xlimits)
+    ylimits = sorted(ylimits)
+    rows    = (max(0, int(np.floor(ylimits[0]+0.5))), min(shape[0], int(np.ceil(ylimits[1]+0.5))))
+    columns = (max(0, int(np.floor(xlimits[0]+0.5))), min(shape[1], int(np.ceil(xlimits[1]+0.5))))
+    return rows+columns
+
+
+class ImagePyramid(object):
+    # multi-resolution levels of a 2D image to render no more data than
+    # canvas pixels. Level (i,j) is data decimated by 2**i rows and 2**j
+    # columns. Coarse levels are computed from the nearest finer computed one
+    # when first needed and the last maximumLevels are kept. Finest levels
+    # are only computed for the shown region.
+    def __init__(self, data, method="mean", maximumLevels=4):
+        self.__data          = data
+        self.__method        = method
+        self.__maximumLevels = maximumLevels
+        self.__levels        = OrderedDict()
+        self.__view          = (None, None)
+    
+    @property
+    def data(self):
+        return self.__data
+        
+    def __get_level(self, level):
+        if level in self.__levels:
+            self.__levels[level] = self.__levels.pop(level)
+            return self.__levels[level]
+        # decimate from the coarsest computed level dividing requested one
+        source, sourceLevel = self.__data, (0,0)
+        for computed in self.__levels:
+            if computed[0]<=level[0] and computed[1]<=level[1] and sum(computed)>sum(sourceLevel):
+                source, sourceLevel = self.__levels[computed], computed
+        data = GET_DECIMATED_DATA(source, 2**(level[0]-sourceLevel[0]), 2**(level[1]-sourceLevel[1]), method=self.__method)
+        self.__levels[level] = data
+        while len(self.__levels) > self.__maximumLevels:
+            self.__levels.popitem(last=False)
+        return data
+        
+    def get_view(self, rows, columns, height, width):
+        # get image of data rows (start, stop) and columns (start, stop) region
+        # to render on height x width pixels. Returned image is decimated when
+        # region has more data than pixels. Returned region (rowStart, rowStop,
+        # columnStart, columnStop) is the data covered by image.
+        nrows, ncolumns = self.__data.shape
+        rows    = (max(0, int(rows[0])), min(nrows, int(np.ceil(rows[1]))))
+        columns = (max(0, int(columns[0])), min(ncolumns, int(np.ceil(columns[1]))))
+        level   = [0, 0]
+        for axis, (start, stop), size, pixels in ((0, rows, nrows, height), (1, columns, ncolumns, width)):
+            while 2**(level[axis]+1) <= float(stop-start)/max(pixels,1) and size//2**(level[axis]+1):
+                level[axis] += 1
+        # region in level blocks
+        rowFactor, columnFactor = 2**level[0], 2**level[1]
+        rowStart, columnStart   = rows[0]//rowFactor, columns[0]//columnFactor
+        rowStop    = max(rowStart, min(nrows//rowFactor, -(-rows[1]//rowFactor)))
+        columnStop = max(columnStart, min(ncolumns//columnFactor, -(-columns[1]//columnFactor)))
+        region     = (rowStart*rowFactor, rowStop*rowFactor, columnStart*columnFactor, columnStop*columnFactor)
+        key        = (tuple(level), region)
+        # same view is returned while level and region don't change
+        if key == self.__view[0]:
+            return self.__view[1], region
+        if level == [0, 0]:
+            image = self.__data[region[0]:region[1], region[2]:region[3]]
+        elif sum(level) < 2:
+            # decimate shown region only, it has at most a few times more data than pixels
+            image = GET_DECIMATED_DATA(self.__data[region[0]:region[1], region[2]:region[3]], rowFactor, columnFactor, method=self.__method)
+        else:
+            image = self.__get_level(tuple(level))[rowStart:rowStop, columnStart:columnStop]
+        self.__view = (key, image)
+        return image, region
+
+
+def GET_SCEDASTICITY_CORRELATION(y0, y1, halfwindow):
+    # windowed correlation between y0 and y1. At every position idx it is
+    # the dot product of y0 and y1 windows [idx-halfwindow, idx+halfwindow]
+    # over the product of their norms. Positions where the window doesn't
+    # fit in data are nan. Cost doesn't depend on the window size because
+    # dot products and norms are computed from blocks prefix and suffix
+    # sums. Sums are accumulated in float64 and correlations are stored in
+    # float32.
+    y0 = np.asarray(y0, dtype=np.float64)
+    y1 = np.asarray(y1, dtype=np.float64)
+    assert y0.shape == y1.shape, "y0 and y1 must have the same shape"
+    window = 2*halfwindow+1
+    # create correlation vector
+    corr = np.full(len(y0), np.nan, dtype=np.float32)
+    if window > len(y0):
+        return corr
+    # calculate windowed dot products and squared norms
+    dotproduct = GET_WINDOW_SUMS(y0*y1, window)
+    normy0     = GET_WINDOW_SUMS(y0*y0, window)
+    normy1     = GET_WINDOW_SUMS(y1*y1, window)
+    # cancellation errors can produce tiny negative squared norms
+    np.maximum(normy0, 0, out=normy0)
+    np.maximum(normy1, 0, out=normy1)
+    # calculate correlations
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr[halfwindow:len(y0)-halfwindow] = dotproduct/np.sqrt(normy0*normy1)
+    return corr
+
+
+def GET_WINDOWED_NORMS(data, halfwindow):
+    # norms of every data row windows [idx-halfwindow, idx+halfwindow] for
+    # idx from halfwindow to the number of points minus halfwindow. Norms
+    # don't depend on the files interval and can be shared by all intervals.
+    # Sums are float64 and norms are stored as float32 like data.
+    data   = np.asarray(data)
+    window = 2*halfwindow+1
+    norms  = GET_WINDOW_SUMS(np.square(data, dtype=np.float64), window)
+    np.maximum(norms, 0, out=norms)
+    np.sqrt(norms, out=norms)
+    return norms.astype(np.float32)
+
+
+def GET_SCEDASTICITY_MAP(data, interval, halfwindow, norms=None):
+    # scedasticity correlation between every data row idx and row idx+interval
+    # computed all at once along the points axis. Every row windowed norms
+    # are computed once and shared by the two pairs it belongs to. norms are
+    # data GET_WINDOWED_NORMS and are computed when not given. Map is float32.
+    data = np.asarray(data)
+    assert len(data.shape) == 2, "data must be a 2D array"
+    nrows   = max(data.shape[0]-interval, 0)
+    npoints = data.shape[1]
+    window  = 2*halfwindow+1
+    # create scedasticity map
+    scedasticity = np.full((nrows, npoints), np.nan, dtype=np.float32)
+    if not nrows or window > npoints:
+        return scedasticity
+    # calculate windowed norms of all rows
+    if norms is None:
+        norms = GET_WINDOWED_NORMS(data, halfwindow)
+    # calculate windowed dot products of all pairs
+    dotproduct = GET_WINDOW_SUMS(np.multiply(data[:-interval], data[interval:], dtype=np.float64), window)
+    # calculate correlations
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scedasticity[:,halfwindow:npoints-halfwindow] = dotproduct/np.multiply(norms[:-interval], norms[interval:], dtype=np.float64)
+    return scedasticity
+
+
+def _ATTACH_SHARED_ARRAY(name, shape, dtype):
+    # attach to an existing shared memory block without tracking it, the
+    # creating process is the only one responsible of unlinking it.
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _INIT_SCEDASTICITY_WORKER(data, out, norms=None):
+    # pool initializer, data, out and norms are (name, shape, dtype) of shared
+    # arrays. norms is None when windowed norms are computed by workers.
+    _WORKER_ARRAYS["data"] = _ATTACH_SHARED_ARRAY(*data)
+    _WORKER_ARRAYS["out"]  = _ATTACH_SHARED_ARRAY(*out)
+    if norms is not None:
+        _WORKER_ARRAYS["norms"] = _ATTACH_SHARED_ARRAY(*norms)
+
+
+def _SCEDASTICITY_ROWS_TASK(args):
+    # compute scedasticity rows from start to stop into shared output
+    start, stop, interval, halfwindow = args
+    data  = _WORKER_ARRAYS["data"][1]
+    out   = _WORKER_ARRAYS["out"][1]
+    norms = _WORKER_ARRAYS.get("norms", (None, None))[1]
+    if norms is not None:
+        norms = norms[start:stop+interval]
+    out[start:stop] = GET_SCEDASTICITY_MAP(data[start:stop+interval], interval, halfwindow, norms=norms)
+    return stop-start, GET_NAN_LIMITS(out[start:stop])
+
+
+def GET_SCEDASTICITY_MAP_PARALLEL(data, interval, halfwindow, workers, norms=None, callback=None):
+    # same as GET_SCEDASTICITY_MAP computed by a pool of workers processes.
+    # Data are copied once to shared memory and every worker writes its rows
+    # in a shared output map, so no array is pickled. callback is called
+    # with the number of computed rows and the total number of rows every
+    # time a chunk of rows is computed. When shared memory is not available
+    # the map is computed in this process. Every worker returns its rows
+    # limits. norms are data GET_WINDOWED_NORMS, they are shared with workers
+    # when given and computed by workers otherwise. Returns map, minimum and
+    # maximum.
+    data  = np.asarray(data)
+    nrows = max(data.shape[0]-interval, 0)
+    if shared_memory is None or workers <= 1 or nrows < 2:
+        scedasticity = GET_SCEDASTICITY_MAP(data, interval, halfwindow, norms=norms)
+        if callback is not None:
+            callback(nrows, nrows)
+        return (scedasticity,) + GET_NAN_LIMITS(scedasticity)
+    workers   = min(workers, nrows)
+    chunkRows = max(1, int(np.ceil(nrows/(4.*workers))))
+    tasks     = [(start, min(start+chunkRows, nrows), interval, halfwindow) for start in range(0, nrows, chunkRows)]
+    dataShm   = shared_memory.SharedMemory(create=True, size=max(data.nbytes,1))
+    outShm    = shared_memory.SharedMemory(create=True, size=max(nrows*data.shape[1]*4,1))
+    normsShm  = None
+    try:
+        sharedData = np.ndarray(data.shape, dtype=data.dtype, buffer=dataShm.buf)
+        sharedData[...] = data
+        sharedOut  = np.ndarray((nrows, data.shape[1]), dtype=np.float32, buffer=outShm.buf)
+        initargs   = ( (dataShm.name, data.shape, data.dtype.str),
+                       (outShm.name, sharedOut.shape, sharedOut.dtype.str) )
+        if norms is not None:
+            norms       = np.asarray(norms)
+            normsShm    = shared_memory.SharedMemory(create=True, size=max(norms.nbytes,1))
+            sharedNorms = np.ndarray(norms.shape, dtype=norms.dtype, buffer=normsShm.buf)
+            sharedNorms[...] = norms
+            initargs   += ( (normsShm.name, norms.shape, norms.dtype.str), )
+            del sharedNorms
+        pool = multiprocessing.Pool(processes = workers,
+                                    initializer = _INIT_SCEDASTICITY_WORKER,
+                                    initargs = initargs)
+        try:
+            done   = 0
+            limits = (np.inf, -np.inf)
+            for n, rowsLimits in pool.imap_unordered(_SCEDASTICITY_ROWS_TASK, tasks):
+                done  += n
+                limits = (float(np.fmin(limits[0], rowsLimits[0])), float(np.fmax(limits[1], rowsLimits[1])))
+                if callback is not None:
+                    callback(done, nrows)
+        finally:
+            pool.terminate()
+            pool.join()
+        scedasticity = np.array(sharedOut)
+        del sharedData, sharedOut
+    finally:
+        dataShm.close()
+        dataShm.unlink()
+        outShm.close()
+        outShm.unlink()
+        if normsShm is not None:
+            normsShm.close()
+            normsShm.unlink()
+    return (scedasticity,) + limits
+
+
+def GET_SCEDASTICITY_MAP_CHUNKED(data, interval, halfwindow, out=None, memoryBudget=256*1024**2, norms=None, callback=None):
+    # same as GET_SCEDASTICITY_MAP computed by chunks of rows and written in
+    # out which can be a disk-backed memory map (e.g. np.lib.format.open_memmap).
+    # Chunks are sized to keep computation memory below memoryBudget bytes.
+    # Map minimum and maximum are tracked while chunks are computed.
+    # callback is called with the number of computed rows and the total
+    # number of rows after every chunk. norms are data GET_WINDOWED_NORMS
+    # and are computed for every chunk when not given. Returns out, minimum
+    # and maximum.
+    data    = np.asarray(data)
+    nrows   = max(data.shape[0]-interval, 0)
+    npoints = data.shape[1]
+    if out is None:
+        out = np.empty((nrows, npoints), dtype=np.float32)
+    assert out.shape == (nrows, npoints), "out shape must be %s"%str((nrows, npoints))
+    # about 8 float64 temporary vectors are needed to compute a row
+    chunkRows = max(1, int(memoryBudget/(8*8*max(npoints,1)))-interval)
+    limits    = (np.inf, -np.inf)
+    for start in range(0, nrows, chunkRows):
+        stop = min(start+chunkRows, nrows)
+        rows = GET_SCEDASTICITY_MAP(data[start:stop+interval], interval, halfwindow,
+                                    norms=None if norms is None else norms[start:stop+interval])
+        out[start:stop] = rows
+        limits = GET_NAN_LIMITS(rows, limits)
+        if callback is not None:
+            callback(stop, nrows)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return (out,) + limits
+
+
+def GET_SCEDASTICITY_INTERVALS_CUBE(data, intervals, halfwindow, norms=None, callback=None):
+    # scedasticity maps of many files intervals stacked in a 3D array of
+    # shape (len(intervals), number of rows - smallest interval, number of points).
+    # Maps of bigger intervals have less rows and are padded with nan at the end.
+    # Windowed norms are computed once and shared by all intervals. callback
+    # is called with the number of computed intervals and the total number of
+    # intervals after every interval.
+    data = np.asarray(data)
+    assert len(data.shape) == 2, "data must be a 2D array"
+    nrows   = max(data.shape[0]-min(intervals), 0)
+    npoints = data.shape[1]
+    window  = 2*halfwindow+1
+    # create cube
+    cube = np.full((len(intervals), nrows, npoints), np.nan, dtype=np.float32)
+    if not nrows or window > npoints:
+        return cube
+    if norms is None:
+        norms = GET_WINDOWED_NORMS(data, halfwindow)
+    for idx, interval in enumerate(intervals):
+        if interval >= data.shape[0]:
+            continue
+        cube[idx,:data.shape[0]-interval] = GET_SCEDASTICITY_MAP(data, interval, halfwindow, norms=norms)
+        if callback is not None:
+            callback(idx+1, len(intervals))
+    return cube
+
+
+def GET_NORMALIZED_DATA(data):
+    # center every data row on its mean and scale it to unit norm. Pearson
+    # correlation of two rows is then the dot product of their normalized rows.
+    normalized = np.array(data, dtype=np.float64)
+    normalized -= np.mean(normalized, axis=1, keepdims=True)
+    norms = np.sqrt(np.einsum('ij,ij->i', normalized, normalized))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized /= norms[:,None]
+    return normalized
+
+
+def GET_LAGS_CORRELATION(normalized, lags):
+    # correlation curves between every normalized row idx and row idx+lag for
+    # all given lags. Curves are returned as rows of a 2D array of length the
+    # number of rows minus the smallest lag, padded with nan at the end.
+    nrows  = len(normalized)
+    lags   = [int(lag) for lag in lags]
+    length = max(nrows-min(lags), 0)
+    curves = np.nan*np.zeros((len(lags), length))
+    for idx, lag in enumerate(lags):
+        if lag >= nrows:
+            continue
+        curves[idx,:nrows-lag] = np.einsum('ij,ij->i', normalized[:-lag], normalized[lag:])
+    return curves
+
+
+def GET_CORRELATION_MATRIX(normalized, blockSize=None, callback=None):
+    # correlation between all pairs of normalized rows computed as matrix
+    # products by blocks of rows, only blocks on and above the diagonal are
+    # computed. blockSize is the number of rows of a block, by default
+    # blocks are limited to 64MB. callback is called with the number of
+    # computed rows and the total number of rows after every block.
+    nrows = len(normalized)
+    if blockSize is None:
+        blockSize = max(1, int(64*1024**2/(8*max(nrows,1))))
+    result = np.empty((nrows,nrows), dtype=np.float32)
+    for start in range(0, nrows, blockSize):
+        stop  = min(nrows, start+blockSize)
+        block = np.dot(normalized[start:stop], normalized[start:].T)
+        result[start:stop,start:] = block
+        result[start:,start:stop] = block.T
+        if callback is not None:
+            callback(stop, nrows)
+    return result
+
+
+def GET_SCEDASTICITY_SCALE_SPACE(data, interval, halfwindows, callback=None):
+    # scedasticity maps of many window sizes stacked in a 3D array of
+    # shape (len(halfwindows), number of rows - interval, number of points).
+    # Squares and pairs products are computed once and shared by all windows.
+    # callback is called with the number of computed windows and the total
+    # number of windows after every window.
+    data = np.asarray(data)
+    assert len(data.shape) == 2, "data must be a 2D array"
+    nrows   = max(data.shape[0]-interval, 0)
+    npoints = data.shape[1]
+    # create scale space
+    scaleSpace = np.full((len(halfwindows), nrows, npoints), np.nan, dtype=np.float32)
+    if not nrows:
+        return scaleSpace
+    # calculate squares and pairs products once
+    squares  = np.square(data, dtype=np.float64)
+    products = np.multiply(data[:-interval], data[interval:], dtype=np.float64)
+    for idx, halfwindow in enumerate(halfwindows):
+        window = 2*halfwindow+1
+        if window > npoints:
+            continue
+        norms = GET_WINDOW_SUMS(squares, window)
+        np.maximum(norms, 0, out=norms)
+        np.sqrt(norms, out=norms)
+        dotproduct = GET_WINDOW_SUMS(products, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scaleSpace[idx,:,halfwindow:npoints-halfwindow] = dotproduct/(norms[:-interval]*norms[interval:])
+        if callback is not None:
+            callback(idx+1, len(halfwindows))
+    return scaleSpace
+
+
+def GET_SELECTED_DATA(data, rows=None, columns=None):
+    # select data rows and columns indexes or slices. When nothing is selected
+    # data itself is returned, slices are views and indexes are taken in a
+    # single contiguous copy.
+    if isinstance(rows, slice):
+        data, rows = data[rows], None
+    if isinstance(columns, slice):
+        data, columns = data[:,columns], None
+    if rows is None and columns is None:
+        return data
+    if columns is None:
+        return np.take(data, rows, axis=0)
+    if rows is None:
+        return np.take(data, columns, axis=1)
+    return data[np.ix_(rows, columns)]
+
+
+class IndexSelection(object):
+    # used and ignored indexes of a data axis. Used and ignored indexes are
+    # None, a range or a list. Selection is computed once per axis size as a
+    # boolean mask and given as None when no indexes are used or ignored, a
+    # slice when selected indexes are evenly spaced or an indexes array.
+    def __init__(self, use=None, ignore=None):
+        self.__use    = use
+        self.__ignore = ignore
+        self.__size   = None
+        self.__mask   = None
+        self.__index  = None
+    
+    @property
+    def selectsAll(self):
+        return self.__use is None and self.__ignore is None
+        
+    def __set_mask(self, mask, indexes, value):
+        # ranges are set as slices and lists as indexes arrays
+        if hasattr(indexes, "step"):
+            mask[indexes.start:indexes.stop:indexes.step] = value
+        else:
+            indexes = np.asarray(indexes, dtype=int)
+            mask[indexes[indexes<len(mask)]] = value
+    
+    def get_mask(self, size):
+        if self.__size != size:
+            if self.__use is None:
+                mask = np.ones(size, dtype=bool)
+            else:
+                mask = np.zeros(size, dtype=bool)
+                self.__set_mask(mask, self.__use, True)
+            if self.__ignore is not None:
+                self.__set_mask(mask, self.__ignore, False)
+            self.__size  = size
+            self.__mask  = mask
+            self.__index = None
+        return self.__mask
+        
+    def get_indexes(self, size, start=0):
+        # selected indexes array from start
+        return np.flatnonzero(self.get_mask(size)[start:])+start
+    
+    def get_index(self, size):
+        if self.selectsAll:
+            return None
+        # mask is computed again when size changes
+        self.get_mask(size)
+        if self.__index is None:
+            indexes = self.get_indexes(size)
+            if len(indexes) == 1:
+                self.__index = slice(int(indexes[0]), int(indexes[0])+1, 1)
+            elif len(indexes) and np.all(np.diff(indexes) == indexes[1]-indexes[0]):
+                self.__index = slice(int(indexes[0]), int(indexes[-1])+1, int(indexes[1]-indexes[0]))
+            else:
+                self.__index = indexes
+        return self.__index
+
+
+class RowsBuffer(object):
+    # rows container with amortized constant time appending. Rows are stored
+    # in a bigger array and data is a view of the filled rows only.
+    def __init__(self, buffer, size=None):
+        self.__buffer = buffer
+        if size is None:
+            size = len(buffer)
+        self.__size = size
+    
+    def __len__(self):
+        return self.__size
+        
+    @property
+    def data(self):
+        return self.__buffer[:self.__size]
+        
+    def append(self, rows):
+        rows = np.asarray(rows)
+        size = self.__size+len(rows)
+        # grow buffer by doubling its capacity, read-only buffers are copied
+        if size > len(self.__buffer) or not self.__buffer.flags.writeable:
+            capacity = max(size, 2*len(self.__buffer), 16)
+            buffer   = np.empty((capacity,)+self.__buffer.shape[1:], dtype=self.__buffer.dtype)
+            buffer[:self.__size] = self.__buffer[:self.__size]
+            self.__buffer = buffer
+        self.__buffer[self.__size:size] = rows
+        self.__size = size
+        return self.data
+
+
+# data manipulation formula numpy functions. Elementwise functions are
+# applied on all data rows at once, other functions might reduce a row
+# and are applied row by row. Generalized universal functions such as
+# matmul are not elementwise.
+FORMULA_ELEMENTWISE_FUNCTIONS = set([name for name in dir(np) if isinstance(getattr(np, name), np.ufunc)
+                                                             and getattr(getattr(np, name), "signature", None) is None])
+FORMULA_ELEMENTWISE_FUNCTIONS.update(["clip", "where", "round", "around", "nan_to_num"])
+FORMULA_NUMPY_FUNCTIONS = set(FORMULA_ELEMENTWISE_FUNCTIONS)
+FORMULA_NUMPY_FUNCTIONS.update([name for name in dir(np) if isinstance(getattr(np, name), np.ufunc)])
+FORMULA_NUMPY_FUNCTIONS.update(["mean", "average", "median", "std", "var", "sum", "prod", "min", "max", "amin", "amax", "ptp",
+                                "nanmean", "nanmedian", "nanstd", "nanvar", "nansum", "nanmin", "nanmax",
+                                "percentile", "nanpercentile", "cumsum", "cumprod", "diff", "gradient",
+                                "roll", "flip", "convolve", "ones", "zeros", "linspace", "arange"])
+FORMULA_NUMPY_CONSTANTS = set(["pi", "e", "nan", "inf"])
+FORMULA_NAMES           = set(["dataFile", "np", "None", "True", "False"])
+FORMULA_NODES           = tuple([getattr(ast, name) for name in
+                                 ("Expression", "BinOp", "UnaryOp", "Compare", "Call", "keyword",
+                                  "Attribute", "Name", "Load", "Subscript", "Index", "Slice", "ExtSlice",
+                                  "Tuple", "IfExp", "Add", "Sub", "Mult", "Div", "FloorDiv", "Mod", "Pow",
+                                  "USub", "UAdd", "Eq", "NotEq", "Lt", "LtE", "Gt", "GtE") if hasattr(ast, name)])
+# numbers and strings are parsed as constants since python 3.8
+if sys.version_info >= (3,8):
+    FORMULA_NODES += (ast.Constant,)
+else:
+    FORMULA_NODES += tuple([getattr(ast, name) for name in ("Num", "Str", "NameConstant") if hasattr(ast, name)])
+
+
+class DataFormula(object):
+    # data manipulation formula of the variable dataFile. Formula is parsed,
+    # checked against allowed numpy functions and compiled once. Formulas
+    # calling elementwise functions only are evaluated on all data at once,
+    # otherwise every row is evaluated alone. Last result is kept with the
+    # key it is evaluated for.
+    def __init__(self, formula):
+        self.__formula = formula
+        tree = ast.parse(formula.strip(), mode="eval")
+        self.__elementwise = True
+        for node in ast.walk(tree):
+            assert isinstance(node, FORMULA_NODES), "'%s' is not allowed in formula"%type(node).__name__
+            if isinstance(node, ast.Name):
+                assert node.id in FORMULA_NAMES, "name '%s' is not allowed in formula"%node.id
+            elif isinstance(node, ast.Attribute):
+                assert isinstance(node.value, ast.Name) and node.value.id == "np", "only numpy functions are allowed in formula"
+                assert node.attr in FORMULA_NUMPY_FUNCTIONS or node.attr in FORMULA_NUMPY_CONSTANTS, "numpy '%s' is not allowed in formula"%node.attr
+                if node.attr not in FORMULA_ELEMENTWISE_FUNCTIONS and node.attr not in FORMULA_NUMPY_CONSTANTS:
+                    self.__elementwise = False
+            elif isinstance(node, ast.Call):
+                assert isinstance(node.func, ast.Attribute), "only numpy functions can be called in formula"
+            elif isinstance(node, ast.Subscript):
+                self.__elementwise = False
+        self.__code   = compile(tree, "<formula>", "eval")
+        self.__key    = None
+        self.__result = None
+    
+    @property
+    def formula(self):
+        return self.__formula
+    
+    @property
+    def elementwise(self):
+        return self.__elementwise
+    
+    def __evaluate(self, dataFile):
+        return eval(self.__code, {"__builtins__":{}, "np":np}, {"dataFile":dataFile})
+        
+    def evaluate(self, data, key=None):
+        # evaluate formula on data rows, a new float32 array of data shape is
+        # returned. When key is given, result is kept and returned again for
+        # the same key.
+        if key is not None and key == self.__key:
+            return self.__result
+        result = np.empty(data.shape, dtype=np.float32)
+        if self.__elementwise:
+            values = self.__evaluate(data)
+            assert np.shape(values) == data.shape, "formula result shape %s is not data shape %s"%(np.shape(values), data.shape)
+            result[...] = values
+        else:
+            for idx in range(data.shape[0]):
+                values = self.__evaluate(data[idx])
+                assert np.shape(values) == data.shape[1:], "formula result shape %s is not data file shape %s"%(np.shape(values), data.shape[1:])
+                result[idx] = values
+        if key is not None:
+            self.__key    = key
+            self.__result = result
+        return result
+
+
+def READ_COLUMN_FILE(path, comment, headerLines, footerLines, useColumn):
+    # fast reading of a single data column from a whitespace delimited text
+    # file having the same number of columns in every line. Header lines are
+    # skipped by byte offset and only useColumn values are converted to float32.
+    # None is returned when file layout is irregular.
+    with open(path, 'rb') as fd:
+        text = fd.read()
+    # skip header lines
+    offset = 0
+    for _ in range(headerLines):
+        offset = text.find(b'\n', offset)+1
+        if not offset:
+            return None
+    body = text[offset:]
+    # remove comments
+    if comment:
+        comment = comment.encode() if not isinstance(comment, bytes) else comment
+        if comment in body:
+            body = b'\n'.join([l.split(comment,1)[0] for l in body.splitlines()])
+    # check layout
+    lines = [l for l in body.splitlines() if l.strip()]
+    if not len(lines):
+        return None
+    ncols  = len(lines[0].split())
+    tokens = body.split()
+    if useColumn >= ncols or len(tokens) != len(lines)*ncols:
+        return None
+    # convert used column
+    nrows = len(lines)-footerLines
+    if nrows <= 0:
+        return None
+    try:
+        d = np.array(tokens[useColumn:nrows*ncols:ncols], dtype=np.float32)
+    except ValueError:
+        return None
+    return d
+
+
+def READ_VECTOR_FILE(path, comment, delimiter, headerLines, footerLines, useColumn):
+    # read a single data column from a text file. Whitespace delimited files
+    # are read with the fast parser, genfromtxt is used for any other file.
+    if not delimiter:
+        d = READ_COLUMN_FILE(path, comment     = comment, 
+                                   headerLines = headerLines,
+                                   footerLines = footerLines,
+                                   useColumn   = useColumn)
+        if d is not None:
+            return d
+    d = np.genfromtxt(path, dtype    = np.float32,
+                      comments    = comment, 
+                      delimiter   = delimiter, 
+                      skip_header = headerLines,
+                      skip_footer = footerLines,
+                      usecols     = useColumn)
+    assert len(d), "file must have data"
+    return d
+
+
+def READ_MATRIX_FILE(path, comment, delimiter, headerLines, footerLines):
+    # read a N lines and M columns matrix from a text file
+    d = np.genfromtxt(path, dtype = np.float32,
+                       comments    = comment, 
+                       delimiter   = delimiter, 
+                       skip_header = headerLines,
+                       skip_footer = footerLines)
+    assert len(d.shape) == 2, "matrix should have N lines and M columns"
+    return d
+
+
+def IS_BINARY_MATRIX_FILE(path):
+    return os.path.splitext(path)[1].lower() in (".npy", ".raw", ".bin")
+
+
+def READ_BINARY_MATRIX_FILE(path, shape=None, dtype=np.float32):
+    # memory map a N lines and M columns binary matrix without reading it.
+    # .npy files are self described, raw files are little endian data of
+    # the given shape and dtype.
+    if path.lower().endswith(".npy"):
+        d = np.load(path, mmap_mode='r')
+    else:
+        assert shape is not None, "raw matrix shape must be given"
+        dtype    = np.dtype(dtype).newbyteorder('<')
+        expected = int(shape[0])*int(shape[1])*dtype.itemsize
+        size     = os.path.getsize(path)
+        assert size == expected, "file size %i doesn't match %s matrix of shape %s"%(size, dtype.name, str(tuple(shape)))
+        d = np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+    assert len(d.shape) == 2, "matrix should have N lines and M columns"
+    return d
+
+
+def _READ_VECTOR_FILE_TASK(args):
+    # pool task, errors are returned rather than raised to keep reading other files
+    path, cache, kwargs = args
+    try:
+        d = None
+        if cache is not None:
+            key = cache.get_key(path, **kwargs)
+            d   = cache.get(key)
+        if d is None:
+            d = READ_VECTOR_FILE(path, **kwargs)
+            if cache is not None:
+                cache.set(key, d)
+    except Exception as e:
+        return path, None, str(e)
+    else:
+        return path, d, None
+
+
+def READ_VECTOR_FILES(files, workers=1, cache=None, **kwargs):
+    # generator of (path, data, error) of every file in the given files order.
+    # data is None when reading failed and error is the error message.
+    # When workers is bigger than 1 files are parsed in a pool of processes.
+    # When a SpectraCache is given, cached data are used instead of parsing.
+    tasks = [(f, cache, kwargs) for f in files]
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _READ_VECTOR_FILE_TASK(task)
+    else:
+        workers   = min(workers, len(tasks))
+        chunksize = max(1, len(tasks)//(4*workers))
+        pool = multiprocessing.Pool(processes=workers)
+        try:
+            for result in pool.imap(_READ_VECTOR_FILE_TASK, tasks, chunksize):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+    # limit cache size once all files are read
+    if cache is not None:
+        cache.evict()
+
+
+class SpectraCache(object):
+    # on-disk cache of parsed data stored as .npy files and loaded memory mapped.
+    # Entries are keyed by file path, size, modification time and read parameters.
+    # Least recently used entries are removed when cache exceeds maximumSize bytes.
+    def __init__(self, directory, maximumSize):
+        self.__directory   = os.path.abspath(directory)
+        self.__maximumSize = maximumSize
+    
+    @property
+    def directory(self):
+        return self.__directory
+    
+    @property
+    def maximumSize(self):
+        return self.__maximumSize
+        
+    def set_maximum_size(self, maximumSize):
+        self.__maximumSize = maximumSize
+        self.evict()
+    
+    def get_key(self, path, **kwargs):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key  = repr( (path, stat.st_size, stat.st_mtime, sorted(kwargs.items())) )
+        return hashlib.sha1(key.encode()).hexdigest()
+    
+    def __get_path(self, key):
+        return os.path.join(self.__directory, key+".npy")
+    
+    def __get_entries(self):
+        # list of (modification time, size, path) of all cache entries
+        if not os.path.isdir(self.__directory):
+            return []
+        entries = []
+        for fname in os.listdir(self.__directory):
+            if not fname.endswith(".npy"):
+                continue
+            path = os.path.join(self.__directory, fname)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append( (stat.st_mtime, stat.st_size, path) )
+        return entries
+        
+    def get(self, key):
+        path = self.__get_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            d = np.load(path, mmap_mode='r')
+            # touch entry to mark it as recently used
+            os.utime(path, None)
+        except Exception:
+            return None
+        return d
+        
+    def set(self, key, data):
+        if self.__maximumSize <= 0:
+            return
+        path = self.__get_path(key)
+        temp = "%s.%i.tmp"%(path, os.getpid())
+        try:
+            if not os.path.isdir(self.__directory):
+                os.makedirs(self.__directory)
+            with open(temp, 'wb') as fd:
+                np.save(fd, np.asarray(data))
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+    
+    def get_size(self):
+        return sum([size for _, size, _ in self.__get_entries()])
+    
+    def evict(self):
+        entries = sorted(self.__get_entries())
+        size    = sum([e[1] for e in entries])
+        for _, entrySize, path in entries:
+            if size <= self.__maximumSize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entrySize
+        
+    def clear(self):
+        for _, _, path in self.__get_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ResultsCache(object):
+    # in memory cache of analysis results. Every entry is set with its size
+    # in bytes and least recently used entries are removed when cache
+    # exceeds maximumSize bytes. Cache is disabled when maximumSize is 0.
+    def __init__(self, maximumSize):
+        self.__maximumSize = maximumSize
+        self.__entries     = OrderedDict()
+        self.__size        = 0
+    
+    @property
+    def maximumSize(self):
+        return self.__maximumSize
+        
+    def set_maximum_size(self, maximumSize):
+        self.__maximumSize = maximumSize
+        self.evict()
+    
+    def get(self, key):
+        if key not in self.__entries:
+            return None
+        # move entry to the end to mark it as recently used
+        value, size = self.__entries.pop(key)
+        self.__entries[key] = (value, size)
+        return value
+        
+    def set(self, key, value, size):
+        if key in self.__entries:
+            self.__size -= self.__entries.pop(key)[1]
+        if size > self.__maximumSize:
+            return
+        self.__entries[key] = (value, size)
+        self.__size += size
+        self.evict()
+    
+    def get_size(self):
+        return self.__size
+        
+    def evict(self):
+        while self.__size > self.__maximumSize and len(self.__entries):
+            _, (_, size) = self.__entries.popitem(last=False)
+            self.__size -= size
+    
+    def clear(self):
+        self.__entries.clear()
+        self.__size = 0
+
+
+def GET_DIRECTORY_SNAPSHOT(directory, pattern="*"):
+    # dictionary of {path: (modification time, size)} of directory files
+    # matching pattern. Many patterns can be given separated by ';'.
+    patterns = [p.strip() for p in pattern.split(";") if p.strip()]
+    snapshot = {}
+    if hasattr(os, "scandir"):
+        entries = [(e.name, e.path, e) for e in os.scandir(directory)]
+    else:
+        entries = [(n, os.path.join(directory, n), None) for n in os.listdir(directory)]
+    for name, path, entry in entries:
+        if not any([fnmatch.fnmatch(name, p) for p in patterns]):
+            continue
+        try:
+            if entry is not None:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            else:
+                if not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+        except OSError:
+            continue
+        snapshot[os.path.normpath(path)] = (stat.st_mtime, stat.st_size)
+    return snapshot
+
+
+class DirectoryWatcher(object):
+    # detects new files written in a directory. Files existing upon creation
+    # are ignored. New files are reported once their size and modification
+    # time didn't change between two successive polls, which avoids reading
+    # files that are still being written.
+    def __init__(self, directory, pattern="*"):
+        self.__directory = directory
+        self.__pattern   = pattern
+        self.__known     = set(GET_DIRECTORY_SNAPSHOT(directory, pattern).keys())
+        self.__pending   = {}
+        
+    @property
+    def directory(self):
+        return self.__directory
+    
+    @property
+    def pattern(self):
+        return self.__pattern
+        
+    def poll(self):
+        # return new files ready to be read sorted by modification time
+        snapshot = GET_DIRECTORY_SNAPSHOT(self.__directory, self.__pattern)
+        ready    = []
+        for path, stat in snapshot.items():
+            if path in self.__known:
+                continue
+            if self.__pending.get(path, None) == stat and stat[1] > 0:
+                ready.append( (stat[0], path) )
+                self.__known.add(path)
+                self.__pending.pop(path)
+            else:
+                self.__pending[path] = stat
+        return [path for _, path in sorted(ready)]
+
+
+class TaskCancelled(Exception):
+    # raised by BackgroundTask progress once the task is cancelled
+    pass
+
+
+class BackgroundTask(object):
+    # run function in a daemon thread. function is called with args and a
+    # progress keyword argument, a callable progress(done, total) that raises
+    # TaskCancelled once cancel is called. onProgress(done, total),
+    # onDone(result), onCancel() and onError(error) are called from the task
+    # thread, GUIs must forward them to their main loop. onProgress calls are
+    # limited to one every progressPeriod seconds.
+    def __init__(self, function, args=(), onProgress=None, onDone=None, onCancel=None, onError=None, progressPeriod=0.05):
+        self.__function       = function
+        self.__args           = args
+        self.__onProgress     = onProgress
+        self.__onDone         = onDone
+        self.__onCancel       = onCancel
+        self.__onError        = onError
+        self.__progressPeriod = progressPeriod
+        self.__progressTime   = 0
+        self.__cancelled      = threading.Event()
+        self.__thread         = threading.Thread(target=self.__run)
+        self.__thread.daemon  = True
+    
+    @property
+    def cancelled(self):
+        return self.__cancelled.is_set()
+        
+    def start(self):
+        self.__thread.start()
+        
+    def cancel(self):
+        self.__cancelled.set()
+    
+    def is_alive(self):
+        return self.__thread.is_alive()
+        
+    def progress(self, done, total):
+        if self.__cancelled.is_set():
+            raise TaskCancelled()
+        if self.__onProgress is None:
+            return
+        now = time.time()
+        if done < total and now-self.__progressTime < self.__progressPeriod:
+            return
+        self.__progressTime = now
+        self.__onProgress(done, total)
+    
+    def __run(self):
+        try:
+            result = self.__function(*self.__args, progress=self.progress)
+        except TaskCancelled:
+            if self.__onCancel is not None:
+                self.__onCancel()
+        except Exception as e:
+            if self.__cancelled.is_set():
+                if self.__onCancel is not None:
+                    self.__onCancel()
+            elif self.__onError is not None:
+                self.__onError(e)
+        else:
+            if self.__onDone is not None:
+                self.__onDone(result)
+
+
+def GET_MAXIMUM_RESIDENT_MEMORY():
+    # process maximum resident memory in bytes, None when it can't be known
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes and mac os bytes
+    if sys.platform != "darwin":
+        maxrss *= 1024
+    return maxrss
+
+
+class StageMeasure(object):
+    # context manager measuring one stage of a StageProfiler. Stage arrays
+    # sizes are recorded with add_array.
+    def __init__(self, profiler, stage, arrays):
+        self.__profiler = profiler
+        self.__stage    = stage
+        self.__arrays   = []
+        for name, array in sorted(arrays.items()):
+            self.add_array(name, array)
+    
+    def add_array(self, name, array):
+        array = np.asarray(array)
+        self.__arrays.append( (name, array.shape, array.nbytes) )
+        
+    def __enter__(self):
+        self.__traced = self.__profiler.traceMemory and tracemalloc is not None
+        if self.__traced:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            self.__memory = tracemalloc.get_traced_memory()[0]
+        self.__time = time.time()
+        self.__wall = WALL_TIME()
+        self.__cpu  = CPU_TIME()
+        return self
+    
+    def __exit__(self, excType, excValue, traceback):
+        wall = WALL_TIME()-self.__wall
+        cpu  = CPU_TIME()-self.__cpu
+        peakMemory = None
+        if self.__traced and tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+            peakMemory = max(tracemalloc.get_traced_memory()[1]-self.__memory, 0)
+        self.__profiler.add( {"stage"          : self.__stage,
+                              "time"           : self.__time,
+                              "wall"           : wall,
+                              "cpu"            : cpu,
+                              "peakMemory"     : peakMemory,
+                              "residentMemory" : GET_MAXIMUM_RESIDENT_MEMORY(),
+                              "arraysBytes"    : sum([a[2] for a in self.__arrays]),
+                              "arrays"         : ";".join(["%s%s"%(a[0], str(tuple(a[1])).replace(" ","")) for a in self.__arrays]),
+                              "failed"         : excType is not None} )
+        return False
+
+
+class StageProfiler(object):
+    # session records of stages wall time, cpu time, peak memory and arrays
+    # sizes. Peak memory is the stage allocated memory peak traced with
+    # tracemalloc when traceMemory is True (python 3.9 and later), it
+    # slows down allocations. Resident memory is the process maximum.
+    # cpu time is the whole process one, so concurrent stages overlap.
+    FIELDS = ("stage", "time", "wall", "cpu", "peakMemory", "residentMemory", "arraysBytes", "arrays", "failed")
+    
+    def __init__(self, traceMemory=False):
+        self.__records     = []
+        self.__lock        = threading.Lock()
+        self.__traceMemory = False
+        self.set_trace_memory(traceMemory)
+    
+    @property
+    def traceMemory(self):
+        return self.__traceMemory
+    
+    @property
+    def records(self):
+        with self.__lock:
+            return list(self.__records)
+        
+    def set_trace_memory(self, traceMemory):
+        self.__traceMemory = bool(traceMemory) and tracemalloc is not None
+        if not self.__traceMemory and tracemalloc is not None and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def measure(self, stage, **arrays):
+        # e.g. with profiler.measure("scedasticity", data=data) as measure:
+        return StageMeasure(self, stage, arrays)
+    
+    def add(self, record):
+        with self.__lock:
+            self.__records.append(record)
+    
+    def clear(self):
+        with self.__lock:
+            self.__records = []
+    
+    def get_summary(self):
+        # list of (stage, count, total wall, total cpu, maximum peak memory, maximum arrays bytes)
+        summary = OrderedDict()
+        for r in self.records:
+            count, wall, cpu, peak, arrays = summary.get(r["stage"], (0, 0., 0., None, 0))
+            if r["peakMemory"] is not None:
+                peak = max(peak or 0, r["peakMemory"])
+            summary[r["stage"]] = (count+1, wall+r["wall"], cpu+r["cpu"], peak, max(arrays, r["arraysBytes"]))
+        return [(stage,)+values for stage, values in summary.items()]
+    
+    def export_json(self, path):
+        with open(path, 'w') as fd:
+            json.dump({"fields":self.FIELDS, "records":self.records}, fd, indent=1)
+    
+    def export_csv(self, path):
+        # csv module needs binary files in python 2 and no newline translation in python 3
+        if sys.version_info[0] >= 3:
+            fd = open(path, 'w', newline='')
+        else:
+            fd = open(path, 'wb')
+        with fd:
+            writer = csv.writer(fd)
+            writer.writerow(self.FIELDS)
+            for r in self.records:
+                writer.writerow([r[f] for f in self.FIELDS])
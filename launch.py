@@ -1,3 +1,4 @@
+import multiprocessing
 import wx
 from scedasticity import MainFrame
 
@@ -8,8 +9,11 @@ class MyApp(wx.App):
         frame.Show(True)
         return True
 
-app = MyApp(0)
-app.MainLoop() 
+if __name__ == "__main__":
+    # needed by parallel files reading processes
+    multiprocessing.freeze_support()
+    app = MyApp(0)
+    app.MainLoop() 
 
 
 
@@ -3,3 +3,6 @@ import os
 
 parameters = {}
 parameters['defaultdir'] = "C:\\Users\\aoun\\Documents\\collaboration\\zonghai\\diffraction_11IDC_29MAR2014\\data"
+parameters['cachedir'] = None
+parameters['cachesize'] = 1024
+parameters['resultscachesize'] = 512
@@ -1,12 +1,13 @@
 # python standard libraries imports
 import os
 import sys
+import time
+import tempfile
 import warnings
 
 # import numpy
 try:
     import numpy as np
-    from numpy.linalg import norm
 except:
     raise Exception("numpy library is not installed.")
 # import wx
@@ -31,12 +32,34 @@ try:
 except:
     raise Exception("scedasticity 'parameters.py' is missing")
 
+# import engine
+try:
+    from engine import GET_SCEDASTICITY_MAP, GET_SCEDASTICITY_SCALE_SPACE, GET_SELECTED_DATA
+    from engine import GET_WINDOWED_NORMS, GET_SCEDASTICITY_INTERVALS_CUBE, GET_SCEDASTICITY_MAP_PARALLEL
+    from engine import GET_SCEDASTICITY_MAP_CHUNKED, GET_NAN_LIMITS, GET_SHOWN_REGION, ImagePyramid
+    from engine import READ_VECTOR_FILES, READ_MATRIX_FILE, SpectraCache
+    from engine import IS_BINARY_MATRIX_FILE, READ_BINARY_MATRIX_FILE
+    from engine import GET_NORMALIZED_DATA, GET_LAGS_CORRELATION, GET_CORRELATION_MATRIX
+    from engine import RowsBuffer, DirectoryWatcher, DataFormula, IndexSelection
+    from engine import ResultsCache
+    from engine import BackgroundTask, StageProfiler
+except:
+    raise Exception("scedasticity 'engine.py' is missing")
+
 
 # set default dir
 DEFAULT_DIR = os.path.abspath(PARAMETERS["defaultdir"])
 if not os.path.isdir(DEFAULT_DIR) or not os.path.exists(DEFAULT_DIR):
     DEFAULT_DIR = os.path.expanduser("~")
 
+# set parsed data cache directory and size in MB
+CACHE_DIR = PARAMETERS.get("cachedir", None)
+if CACHE_DIR is None:
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".scedasticity", "cache")
+CACHE_SIZE = PARAMETERS.get("cachesize", 1024)
+# set analysis results cache size in MB
+RESULTS_CACHE_SIZE = PARAMETERS.get("resultscachesize", 512)
+
 
 def SET_GENERAL_PARAMETERS(**kwargs):
     params = globals()["PARAMETERS"]
@@ -223,7 +246,7 @@ class FloatSlider(wx.Slider):
 
         
 class PlotFigure(wx.Dialog):
-    def __init__(self, parent=None, title="plot", plotTitle='', mapOptions=False, compareOptions=False):
+    def __init__(self, parent=None, title="plot", plotTitle='', mapOptions=False, compareOptions=False, cubeOptions=False):
         wx.Dialog.__init__(self, parent=parent, title=title, style=wx.DEFAULT_DIALOG_STYLE|wx.RESIZE_BORDER|wx.MAXIMIZE_BOX|wx.MINIMIZE_BOX)
         self.__sizer = wx.BoxSizer(wx.VERTICAL)
         toolbarSizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -231,11 +254,20 @@ class PlotFigure(wx.Dialog):
         self.SetBackgroundColour(wx.WHITE)
         # slider settings
         self.__sliderMax = 1000
+        # shown region data limits and redraw period in ms about display frame rate
+        self.__regionLimits = (None, None)
+        self.__redrawPeriod = 16
+        self.__redraw       = None
         # initialize data
         self.__allData  = None
         self.__usedData = None
         self.__image    = None
         self.__vector   = None 
+        self.__cube     = None
+        # image resolution levels and rendered view
+        self.__pyramid   = None
+        self.__imageView = None
+        self.__origin    = "lower"
         # offset variables
         self.__labels        = []
         self.__offsetMaximum = 1
@@ -271,6 +303,9 @@ class PlotFigure(wx.Dialog):
         # add compare options
         if compareOptions:
             self.create_compare_panel()
+        # add cube options
+        if cubeOptions:
+            self.create_cube_panel()
         # set sizer 
         self.SetSizer(self.__sizer)
         self.Fit()
@@ -312,7 +347,19 @@ class PlotFigure(wx.Dialog):
         # add to sizer
         self.__sizer.Add(vSizer, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
         
+    def create_cube_panel(self):
+        vSizer = wx.BoxSizer(wx.VERTICAL) 
+        # cube slice
+        self.__cubeSliceWid = wx.Choice(self, id=-1, choices=[])
+        wid = Widget(parent=self, title="Slice", widget=self.__cubeSliceWid, help = "Set the plotted image among all computed ones.")
+        vSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        # events
+        self.Bind(wx.EVT_CHOICE, self.on_cube_slice, self.__cubeSliceWid)
+        # add to sizer
+        self.__sizer.Add(vSizer, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        
     def draw(self, drawDC=None):
+        self.update_image_view()
         FigureCanvas.draw(self.__canvas, drawDC=drawDC)
         xlimits = [int(l) for l in self.__axes.get_xlim()]
         ylimits = [int(l) for l in self.__axes.get_ylim()]
@@ -342,14 +389,19 @@ class PlotFigure(wx.Dialog):
                    footer='', 
                    comments='# ')
         
-    def plot_vector(self, data,
+    def plot_vector(self, data, labels=None,
                           axis='on',
                           xLabel="number or files", yLabel="correlation",
                           ticksDirection="out"):
         self.__usedData = data
         while self.__axes.lines:
             self.__axes.lines.pop(0)
-        self.__vector   = self.__axes.plot(data)
+        if labels is None:
+            self.__vector = self.__axes.plot(data)
+        else:
+            # every data row is a vector
+            self.__vector = [self.__axes.plot(d, label=l)[0] for d, l in zip(data, labels)]
+            self.__axes.legend(ncol = int(len(labels)/10.)+1, frameon=False)
         self.__axes.axis(axis)
         self.__axes.set_xlabel(xLabel)
         self.__axes.set_ylabel(yLabel)
@@ -377,14 +429,21 @@ class PlotFigure(wx.Dialog):
     def plot_image(self, data, extent=(0,100,0,100), colormap="jet",
                          axis='on', origin="lower",
                          xLabel="number or points", yLabel="number of files",
-                         ticksDirection="out"):
-        # normalize data
+                         ticksDirection="out", limits=None):
+        # limits are data (minimum, maximum) when already known
         self.__usedData = data
-        self.__dMin = float(np.nanmin(self.__usedData))
-        self.__dMax = float(np.nanmax(self.__usedData))
-        # plot image
-        self.__image = self.__axes.imshow( (self.__usedData-self.__dMin)/(self.__dMax-self.__dMin), 
-                                            aspect="auto", origin=origin)
+        self.__set_data_limits(limits)
+        # plot image, data are normalized at render time by image limits. Image
+        # data are set at every draw from the resolution level of shown region
+        self.__origin       = origin
+        self.__pyramid      = ImagePyramid(self.__usedData)
+        self.__imageView    = None
+        self.__regionLimits = (None, None)
+        self.__image = self.__axes.imshow( self.__usedData[:1,:1], vmin=self.__dMin, vmax=self.__dMax,
+                                           extent=self.__get_extent(0, data.shape[0], 0, data.shape[1]),
+                                           aspect="auto", origin=origin)
+        # image extent changes with shown region and must not autoscale axes
+        self.__axes.set_autoscale_on(False)
         #self.__image.set_extent(extent)
         self.__axes.axis(axis)
         self.__axes.set_xlabel(xLabel)
@@ -396,6 +455,67 @@ class PlotFigure(wx.Dialog):
         # set limits
         #self.__limits = [0,self.__usedData.shape[0],0,self.__usedData.shape[1]]
          
+    def plot_cube(self, data, labels, **kwargs):
+        # plot an image of 3D data first axis slices, slices are selected by label
+        self.__cube = data
+        self.__cubeSliceWid.SetItems([str(l) for l in labels])
+        self.__cubeSliceWid.SetSelection(0)
+        self.plot_image(self.__cube[0], **kwargs)
+        
+    def on_cube_slice(self, event):
+        if self.__cube is None: return
+        self.update_image(self.__cube[self.__cubeSliceWid.GetSelection()])
+        
+    def update_image(self, data, limits=None, keepView=False):
+        # replace image data keeping the same image and colormap. When keepView
+        # is True, a zoomed in view is kept and the full view follows data size.
+        if self.__image is None: return
+        previous = self.__get_extent(0, self.__usedData.shape[0], 0, self.__usedData.shape[1])
+        zoomed   = tuple(self.__axes.get_xlim())+tuple(self.__axes.get_ylim()) != previous
+        self.__usedData = data
+        self.__set_data_limits(limits)
+        self.__pyramid      = ImagePyramid(self.__usedData)
+        self.__imageView    = None
+        self.__regionLimits = (None, None)
+        self.__image.set_clim(self.__dMin, self.__dMax)
+        if not (keepView and zoomed):
+            extent = self.__get_extent(0, data.shape[0], 0, data.shape[1])
+            self.__axes.set_xlim(extent[0], extent[1])
+            self.__axes.set_ylim(extent[2], extent[3])
+        self.__canvas.draw()
+    
+    def __get_finite_limits(self, limits):
+        # limits of all nan data are infinite, images of such data are blank
+        if not (np.isfinite(limits[0]) and np.isfinite(limits[1])):
+            return (0., 1.)
+        return (float(limits[0]), float(limits[1]))
+        
+    def __set_data_limits(self, limits=None):
+        if limits is None:
+            limits = GET_NAN_LIMITS(self.__usedData)
+        self.__dMin, self.__dMax = self.__get_finite_limits(limits)
+    
+    def __get_extent(self, rowStart, rowStop, columnStart, columnStop):
+        # image extent of data rows and columns region
+        if self.__origin == "upper":
+            return (columnStart-0.5, columnStop-0.5, rowStop-0.5, rowStart-0.5)
+        return (columnStart-0.5, columnStop-0.5, rowStart-0.5, rowStop-0.5)
+        
+    def update_image_view(self):
+        # set image data to shown region at the resolution of axes pixels.
+        # Full resolution data are only rendered when zoomed in.
+        if self.__image is None or self.__pyramid is None: return
+        xlimits = sorted(self.__axes.get_xlim())
+        ylimits = sorted(self.__axes.get_ylim())
+        image, region = self.__pyramid.get_view(rows=(ylimits[0]+0.5, ylimits[1]+0.5),
+                                                columns=(xlimits[0]+0.5, xlimits[1]+0.5),
+                                                height=self.__axes.bbox.height, width=self.__axes.bbox.width)
+        if image is self.__imageView or not image.size:
+            return
+        self.__imageView = image
+        self.__image.set_data(image)
+        self.__image.set_extent(self.__get_extent(*region))
+        
     def set_cmap(self, colormap):
         idx = self.__cmps.FindString(colormap)
         if idx == -1:
@@ -435,60 +555,55 @@ class PlotFigure(wx.Dialog):
         self.set_colormap( cmap )
         
     def on_min_value_slider(self, event):
-        # get data
-        data = np.copy(self.__usedData)
-        # bring data to positive values
-        dmin = np.nanmin(self.__usedData[self.__limits[0]:self.__limits[1],self.__limits[2]:self.__limits[3]])
-        dmax = np.nanmax(self.__usedData[self.__limits[0]:self.__limits[1],self.__limits[2]:self.__limits[3]])-dmin
-        data -= dmin
         # get min and max
         minValue = self.__minValueSlider.GetValue()
         maxValue = self.__maxValueSlider.GetValue()
         if minValue>=maxValue:
             self.__minValueSlider.SetValue(maxValue-1)
             minValue = maxValue-1 
-        minValue = dmax*float(minValue)/float(self.__sliderMax)
-        maxValue = dmax*float(maxValue)/float(self.__sliderMax)
-        # clip values
-        data =  np.clip(data, minValue, maxValue)  
-        # get min and max
-        dmin = np.nanmin(data)
-        dmax = np.nanmax(data)
-        # plot
-        self.__axes.images[0].set_data( (data-dmin)/(dmax-dmin) )
-        # set axis
-        self.__axes.set_xlim(self.__limits[2],self.__limits[3])
-        self.__axes.set_ylim(self.__limits[0],self.__limits[1])
-        # redraw
-        self.__canvas.draw()
+        self.clip_image(minValue, maxValue)
         
     def on_max_value_slider(self, event):
-        # get data
-        data = np.copy(self.__usedData)
-        # bring data to positive values
-        dmin = np.nanmin(self.__usedData[self.__limits[0]:self.__limits[1],self.__limits[2]:self.__limits[3]])
-        dmax = np.nanmax(self.__usedData[self.__limits[0]:self.__limits[1],self.__limits[2]:self.__limits[3]])-dmin
-        data -= dmin
         # get min and max
         minValue = self.__minValueSlider.GetValue()
         maxValue = self.__maxValueSlider.GetValue()
         if minValue>=maxValue:
             self.__maxValueSlider.SetValue(minValue+1)
             maxValue = minValue+1 
-        minValue = dmax*float(minValue)/float(self.__sliderMax)
-        maxValue = dmax*float(maxValue)/float(self.__sliderMax)
-        # clip values
-        data =  np.clip(data, minValue, maxValue)  
-        # get min and max
-        dmin = np.nanmin(data)
-        dmax = np.nanmax(data)
-        # plot
-        self.__axes.images[0].set_data( (data-dmin)/(dmax-dmin) )
+        self.clip_image(minValue, maxValue)
+        
+    def __get_region_limits(self):
+        # shown data region limits, computed once per shown region. Full view
+        # limits are data limits.
+        shape  = self.__usedData.shape
+        region = GET_SHOWN_REGION(shape, self.__axes.get_xlim(), self.__axes.get_ylim())
+        if region != self.__regionLimits[0]:
+            if region == (0, shape[0], 0, shape[1]):
+                limits = (self.__dMin, self.__dMax)
+            else:
+                limits = GET_NAN_LIMITS(self.__usedData[region[0]:region[1],region[2]:region[3]])
+            self.__regionLimits = (region, limits)
+        return self.__regionLimits[1]
+        
+    def clip_image(self, minValue, maxValue):
+        # clip image colors between sliders values of shown data range.
+        # Clipping is done by image limits, data are not copied.
+        dmin, dmax = self.__get_finite_limits(self.__get_region_limits())
+        dmax -= dmin
+        minValue = dmin + dmax*float(minValue)/float(self.__sliderMax)
+        maxValue = dmin + dmax*float(maxValue)/float(self.__sliderMax)
+        self.__image.set_clim(minValue, maxValue)
         # set axis
         self.__axes.set_xlim(self.__limits[2],self.__limits[3])
         self.__axes.set_ylim(self.__limits[0],self.__limits[1])
-        # redraw
-        self.__canvas.draw()
+        # redraw once per redraw period whatever the number of slider events
+        if self.__redraw is None or not self.__redraw.IsRunning():
+            self.__redraw = wx.CallLater(self.__redrawPeriod, self.__on_redraw)
+    
+    def __on_redraw(self):
+        # plot might be closed before redraw
+        if self:
+            self.__canvas.draw()
         
     
     
@@ -529,6 +644,90 @@ correlation functions and statistical scedasticity formalism."
         self.SetSizer(vbox)
         
     
+class PerformanceReport(wx.Dialog):
+    def __init__(self, profiler, title="Performance report"):
+        wx.Dialog.__init__(self, None, -1, title=title, size=(850,500), style=wx.DEFAULT_DIALOG_STYLE|wx.RESIZE_BORDER)
+        self.CenterOnScreen(wx.BOTH)
+        self.__profiler = profiler
+        # create report text
+        self.__reportWid = wx.TextCtrl(self, -1, style=wx.TE_MULTILINE|wx.TE_READONLY|wx.HSCROLL)
+        self.__reportWid.SetFont( wx.Font(10, wx.MODERN, wx.NORMAL, wx.NORMAL) )
+        # create actions
+        traceMemory = wx.CheckBox(self, -1, label="Trace memory")
+        traceMemory.SetValue(self.__profiler.traceMemory)
+        traceMemory.SetToolTip( wx.ToolTip("Trace stages peak memory, it slows down computations.") )
+        self.Bind(wx.EVT_CHECKBOX, self.on_trace_memory, traceMemory)
+        refresh = wx.Button(self, -1, label="Refresh")
+        self.Bind(wx.EVT_BUTTON, self.on_refresh, refresh)
+        clear = wx.Button(self, -1, label="Clear")
+        self.Bind(wx.EVT_BUTTON, self.on_clear, clear)
+        exportJson = wx.Button(self, -1, label="Export JSON")
+        self.Bind(wx.EVT_BUTTON, self.on_export_json, exportJson)
+        exportCsv = wx.Button(self, -1, label="Export CSV")
+        self.Bind(wx.EVT_BUTTON, self.on_export_csv, exportCsv)
+        # add to sizer
+        hbox = wx.BoxSizer(wx.HORIZONTAL)
+        hbox.Add(traceMemory, 0, wx.ALL|wx.ALIGN_CENTER_VERTICAL, 2)
+        hbox.AddStretchSpacer()
+        hbox.Add(refresh, 0, wx.ALL, 2)
+        hbox.Add(clear, 0, wx.ALL, 2)
+        hbox.Add(exportJson, 0, wx.ALL, 2)
+        hbox.Add(exportCsv, 0, wx.ALL, 2)
+        vbox = wx.BoxSizer(wx.VERTICAL)
+        vbox.Add(self.__reportWid, 1, wx.ALL|wx.EXPAND, 2)
+        vbox.Add(hbox, 0, wx.ALL|wx.EXPAND, 2)
+        self.SetSizer(vbox)
+        # show report
+        self.update_report()
+    
+    def update_report(self):
+        MB = lambda b: "" if b is None else "%.2f"%(b/1024.**2)
+        lines = ["%-14s%8s%14s%14s%16s%16s"%("stage", "count", "wall (s)", "cpu (s)", "peak mem (MB)", "arrays (MB)")]
+        for stage, count, wall, cpu, peak, arrays in self.__profiler.get_summary():
+            lines.append( "%-14s%8i%14.4f%14.4f%16s%16s"%(stage, count, wall, cpu, MB(peak), MB(arrays)) )
+        lines.extend(["", "%-10s%-14s%14s%14s%16s%16s  %s"%("clock", "stage", "wall (s)", "cpu (s)", "peak mem (MB)", "process (MB)", "arrays")])
+        for r in self.__profiler.records:
+            stage = r["stage"]
+            if r["failed"]:
+                stage += " (x)"
+            lines.append( "%-10s%-14s%14.4f%14.4f%16s%16s  %s"%(time.strftime("%H:%M:%S", time.localtime(r["time"])), stage, 
+                                                                r["wall"], r["cpu"], MB(r["peakMemory"]), MB(r["residentMemory"]), r["arrays"]) )
+        self.__reportWid.SetValue("\n".join(lines))
+        
+    def on_trace_memory(self, event):
+        self.__profiler.set_trace_memory(event.GetEventObject().GetValue())
+        event.GetEventObject().SetValue(self.__profiler.traceMemory)
+        
+    def on_refresh(self, event):
+        self.update_report()
+        
+    def on_clear(self, event):
+        self.__profiler.clear()
+        self.update_report()
+    
+    def __get_export_path(self, extension):
+        dialog = wx.FileDialog(parent=self, 
+                               message="Export report", 
+                               defaultDir=DEFAULT_DIR, 
+                               defaultFile="scedasticity_report.%s"%extension, 
+                               wildcard="%s files (*.%s)|*.%s"%(extension, extension, extension),
+                               style= wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+        returned = dialog.ShowModal() 
+        path     = dialog.GetPath()
+        dialog.Destroy()        
+        if returned == wx.ID_CANCEL:
+            return None
+        return path
+        
+    def on_export_json(self, event):
+        path = self.__get_export_path("json")
+        if path is not None:
+            self.__profiler.export_json(path)
+        
+    def on_export_csv(self, event):
+        path = self.__get_export_path("csv")
+        if path is not None:
+            self.__profiler.export_csv(path)
         
         
 class MainFrame(wx.Frame):
@@ -538,14 +737,41 @@ class MainFrame(wx.Frame):
         # initialize variables
         self.__files      = []
         self.__matrixFile = None
+        self.__rawMatrixShape = None
+        self.__rawMatrixType  = "float32"
         # initialize data
-        self.__allData  = []
-        self.__usedData = []
+        self.__allData  = np.zeros((0,0), dtype=np.float32)
+        self.__usedData = np.zeros((0,0), dtype=np.float32)
+        self.__usedFilesIndexes  = None
+        self.__usedPointsIndexes = None
+        self.__normalizedData    = None
+        self.__correlationMatrix = None
+        self.__windowedNorms     = None
+        self.__usedDataOutdated  = False
+        # all data version, changed every time all data change
+        self.__dataVersion = 0
+        # used data version, changed every time used data are set again from all data
+        self.__usedDataVersion = 0
+        # appendable data buffers
+        self.__dataBuffer   = None
+        self.__usedBuffer   = None
+        # initialize analysis results cache
+        self.__resultsCache = ResultsCache(RESULTS_CACHE_SIZE*1024**2)
+        # initialize session stages profiler
+        self.__profiler = StageProfiler()
         # initialize analysis data
+        self.__scedasticityFile = None
         self.initialize_analysis_data()
         # analysis variable
         self.__filesInterval          = 1
+        self.__correlationLags        = {"":None}
+        self.__scedasticityWindows    = {"":None}
+        self.__scedasticityIntervals  = {"":None}
+        self.__computationWorkers     = 1
         self.__scedasticityWindowSize = 25
+        # out of core scedasticity, memory budget is in MB
+        self.__outOfCore              = False
+        self.__memoryBudget           = 256
         # initialize read parameters
         self.__comment        = "#"
         self.__delimiter      = " "
@@ -553,6 +779,22 @@ class MainFrame(wx.Frame):
         self.__footerLines    = 0
         self.__useColumn      = 0
         self.__readColumnWise = False
+        self.__readWorkers    = 1
+        # initialize parsed data cache
+        self.__spectraCache = SpectraCache(CACHE_DIR, CACHE_SIZE*1024**2)
+        # initialize directory watch, periods are in ms
+        self.__watcher            = None
+        self.__watchPeriod        = 1000
+        self.__plotsRefreshPeriod = 3000
+        self.__livePlots          = []
+        self.__plotsOutdated      = False
+        self.__plotsRefreshTime   = 0
+        # initialize background task
+        self.__task      = None
+        self.__taskTitle = None
+        # initialize pending fields edits, debounce period is in ms
+        self.__pendingEdits   = {}
+        self.__debouncePeriod = 300
         # create main panel
         self.__panel = wx.Panel(self, -1, style=wx.SIMPLE_BORDER)
         # create menubar
@@ -584,17 +826,40 @@ class MainFrame(wx.Frame):
         self.on_chi_file_parameter(None)
         # data manipulation variables
         self.initialize_data_manipulation()
+        # create directory watch timer
+        self.__watchTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_watch_timer, self.__watchTimer)
          
     def initialize_analysis_data(self):
-        self.__correlation  = None
-        self.__scedasticity = None
+        self.__correlation        = None
+        self.__scedasticity       = None
+        self.__scedasticityBuffer = None
+        self.__scedasticityLimits = None
+        self.__scaleSpace         = None
+        self.__intervalsCube      = None
+        self.__remove_scedasticity_file()
+    
+    def __remove_scedasticity_file(self):
+        # remove out of core scedasticity file. On some systems a file that
+        # is still mapped by an opened plot can't be removed, it stays in the
+        # temporary directory.
+        if self.__scedasticityFile is None:
+            return
+        try:
+            os.remove(self.__scedasticityFile)
+        except:
+            pass
+        self.__scedasticityFile = None
     
     def initialize_data_manipulation(self):
         self.__useFiles              = {"":None}
         self.__ignoreFiles           = {"":None}
         self.__useDataPoints         = {"":None}
         self.__ignoreDataPoints      = {"":None}
+        self.__filesSelection        = IndexSelection()
+        self.__pointsSelection       = IndexSelection()
         self.__manipulateDataFormula = ""
+        self.__dataFormula           = None
         self.__useFilesWid.ChangeValue("")
         self.__ignoreFilesWid.ChangeValue("")
         self.__useDataPointsWid.ChangeValue("")
@@ -618,14 +883,33 @@ class MainFrame(wx.Frame):
         correlation = wx.Button(self.__panel, -1, label="Correlation")
         correlation.SetToolTip( wx.ToolTip("Compute correlation.") )
         self.Bind(wx.EVT_BUTTON, self.on_compute_correlation, correlation)
+        correlationMatrix = wx.Button(self.__panel, -1, label="Correlation matrix")
+        correlationMatrix.SetToolTip( wx.ToolTip("Compute correlation between all pairs of files.") )
+        self.Bind(wx.EVT_BUTTON, self.on_compute_correlation_matrix, correlationMatrix)
         scedasticity = wx.Button(self.__panel, -1, label="Scedasticity")
         scedasticity.SetToolTip( wx.ToolTip("Compute scedasticity.") )
         self.Bind(wx.EVT_BUTTON, self.on_compute_scedasticity, scedasticity)
+        intervalsCube = wx.Button(self.__panel, -1, label="Intervals cube")
+        intervalsCube.SetToolTip( wx.ToolTip("Compute scedasticity for all scedasticity intervals.") )
+        self.Bind(wx.EVT_BUTTON, self.on_compute_intervals_cube, intervalsCube)
+        scaleSpace = wx.Button(self.__panel, -1, label="Scale-space")
+        scaleSpace.SetToolTip( wx.ToolTip("Compute scedasticity for all scedasticity windows.") )
+        self.Bind(wx.EVT_BUTTON, self.on_compute_scale_space, scaleSpace)
         horizontalSizer.Add(self.__plotSelectedDataBut, proportion=0, flag=wx.ALL, border=2)
         horizontalSizer.Add(self.__compareSelectedDataBut, proportion=0, flag=wx.ALL, border=2)
         horizontalSizer.Add(self.__plotAllDataBut, proportion=0, flag=wx.ALL, border=2)
         horizontalSizer.Add(correlation, proportion=0, flag=wx.ALL, border=2)
+        horizontalSizer.Add(correlationMatrix, proportion=0, flag=wx.ALL, border=2)
         horizontalSizer.Add(scedasticity, proportion=0, flag=wx.ALL, border=2)
+        horizontalSizer.Add(intervalsCube, proportion=0, flag=wx.ALL, border=2)
+        horizontalSizer.Add(scaleSpace, proportion=0, flag=wx.ALL, border=2)
+        # create cancel button
+        self.__cancelTaskBut = wx.Button(self.__panel, -1, label="Cancel")
+        self.__cancelTaskBut.SetToolTip( wx.ToolTip("Cancel running data loading or computation.") )
+        self.__cancelTaskBut.Enable(False)
+        self.Bind(wx.EVT_BUTTON, self.on_cancel_task, self.__cancelTaskBut)
+        horizontalSizer.AddSpacer(10)
+        horizontalSizer.Add(self.__cancelTaskBut, proportion=0, flag=wx.ALL, border=2)
         # add to sizer
         return horizontalSizer
         
@@ -706,9 +990,38 @@ class MainFrame(wx.Frame):
         wid = Widget(parent=panel, title="Column wise", widget=self.__readColumnWiseWid, help = "Set whether to read matrix column or row wise. When checked column wise is activated, which means every column of matrix data file will be considered as a data file.")
         loadBoxSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
         self.Bind(wx.EVT_CHECKBOX, self.on_read_column_wise, self.__readColumnWiseWid)
+        # create read workers
+        self.__readWorkersWid = wx.TextCtrl(panel, value=str(self.__readWorkers))
+        wid = Widget(parent=panel, title="Workers", widget=self.__readWorkersWid, help = "Set the number of processes used to read data files in parallel. When 1, files are read one after the other. It must be a positive non-zero integer")
+        loadBoxSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_TEXT, self.on_read_workers, self.__readWorkersWid)
+        ########################  directory watch  ########################
+        sb = wx.StaticBox(panel, label="Watch directory")
+        watchBoxSizer = wx.StaticBoxSizer(sb, wx.VERTICAL)
+        # create watch directory
+        directorySizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.__watchDirectoryWid = wx.TextCtrl(panel, value=DEFAULT_DIR)
+        self.__watchBrowseWid    = wx.Button(panel, -1, label="...", style=wx.BU_EXACTFIT)
+        directorySizer.Add(self.__watchDirectoryWid, proportion=1, flag=wx.ALL|wx.EXPAND, border=0)
+        directorySizer.Add(self.__watchBrowseWid, proportion=0, flag=wx.LEFT, border=2)
+        wid = Widget(parent=panel, title="Directory", widget=directorySizer, help = "The directory where new data files are written.")
+        watchBoxSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_BUTTON, self.on_browse_watch_directory, self.__watchBrowseWid)
+        # create watch pattern
+        self.__watchPatternWid = wx.TextCtrl(panel, value="*.chi;*.gr;*.dat")
+        wid = Widget(parent=panel, title="Pattern", widget=self.__watchPatternWid, help = "New data files name pattern. Many patterns can be given separated by ';' (e.g. *.chi;*.gr)")
+        watchBoxSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        # create watch button
+        self.__watchWid = wx.ToggleButton(panel, -1, label="Watch")
+        self.__watchWid.SetToolTip( wx.ToolTip("Start or stop watching directory. New data files are read using the reading parameters and appended to data. Opened correlation and scedasticity plots are refreshed.") )
+        watchBoxSizer.Add(self.__watchWid, proportion=0, flag=wx.ALL|wx.ALIGN_RIGHT, border=2)
+        self.Bind(wx.EVT_TOGGLEBUTTON, self.on_watch, self.__watchWid)
         ########################  add all to mainSizer  ########################
+        parametersSizer = wx.BoxSizer(wx.VERTICAL)
+        parametersSizer.Add(loadBoxSizer, proportion=0, flag=wx.ALL|wx.EXPAND, border=0)
+        parametersSizer.Add(watchBoxSizer, proportion=0, flag=wx.TOP|wx.EXPAND, border=2)
         mainSizer.Add(listCtrlSizer, proportion=1, flag=wx.ALL|wx.EXPAND, border=2)
-        mainSizer.Add(loadBoxSizer, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        mainSizer.Add(parametersSizer, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
         panel.SetSizer(mainSizer)
         ########################  return panel  ########################
         return panel
@@ -731,6 +1044,51 @@ When interval is '2' correlation and scedasticity will be computed between every
         wid = Widget(parent=panel, title="Scedasticity window Size", widget=self.__scedasticityWindowSizeWid, help = "Set the window size (delta theta in formula) to compute scedasticity. It must be an odd positive integer")
         mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
         self.Bind(wx.EVT_TEXT, self.on_scedasticity_window_size, self.__scedasticityWindowSizeWid)
+        # create computationWorkersWid
+        self.__computationWorkersWid = wx.TextCtrl(panel, value=str(self.__computationWorkers) )
+        wid = Widget(parent=panel, title="Workers", widget=self.__computationWorkersWid, help = "Set the number of processes used to compute scedasticity in parallel. When 1, scedasticity is computed in the application process. It must be a positive non-zero integer")
+        mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_TEXT, self.on_computation_workers, self.__computationWorkersWid)
+        # create outOfCoreWid
+        self.__outOfCoreWid = wx.CheckBox(panel)
+        self.__outOfCoreWid.SetValue(self.__outOfCore)
+        wid = Widget(parent=panel, title="Out of core", widget=self.__outOfCoreWid, help = "Set whether to compute scedasticity by chunks of files and store it in a temporary file on disk instead of memory. This is meant for scedasticity maps that don't fit in memory. Workers are not used when checked")
+        mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_CHECKBOX, self.on_out_of_core, self.__outOfCoreWid)
+        # create memoryBudgetWid
+        self.__memoryBudgetWid = wx.TextCtrl(panel, value=str(self.__memoryBudget) )
+        wid = Widget(parent=panel, title="Memory budget (MB)", widget=self.__memoryBudgetWid, help = "Set the memory in MB used to compute every chunk of scedasticity. Computation can be cancelled between chunks. It must be a positive non-zero integer")
+        mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_TEXT, self.on_memory_budget, self.__memoryBudgetWid)
+        # create correlationLagsWid
+        self.__correlationLagsWid = wx.TextCtrl(panel, value=str(""), style=wx.TE_PROCESS_ENTER)
+        wid = Widget(parent=panel, title="Correlation lags", widget=self.__correlationLagsWid, 
+                     help = "Set the files intervals to compute correlation curves for. \
+By default, an empty field means correlation is computed for the 'Interval' only. \
+Entry can be a real range such as from:to:step (e.g. 1:10:1), \
+or comma separated intervals (e.g. 1,2,5,10). \
+HIT ENTER TO VALIDATE")
+        mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_TEXT_ENTER, self.on_correlation_lags, self.__correlationLagsWid)
+        # create scedasticityIntervalsWid
+        self.__scedasticityIntervalsWid = wx.TextCtrl(panel, value=str(""), style=wx.TE_PROCESS_ENTER)
+        wid = Widget(parent=panel, title="Scedasticity intervals", widget=self.__scedasticityIntervalsWid, 
+                     help = "Set the files intervals to compute scedasticity intervals cube for. \
+Entry can be a real range such as from:to:step (e.g. 1:10:1), \
+or comma separated intervals (e.g. 1,2,5,10). \
+HIT ENTER TO VALIDATE")
+        mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_TEXT_ENTER, self.on_scedasticity_intervals, self.__scedasticityIntervalsWid)
+        # create scedasticityWindowsWid
+        self.__scedasticityWindowsWid = wx.TextCtrl(panel, value=str(""), style=wx.TE_PROCESS_ENTER)
+        wid = Widget(parent=panel, title="Scedasticity windows", widget=self.__scedasticityWindowsWid, 
+                     help = "Set the window sizes to compute scedasticity scale-space for. \
+Even sizes are reduced by one to become odd. \
+Entry can be a real range such as from:to:step (e.g. 5:101:10), \
+or comma separated sizes (e.g. 11,25,51,101). \
+HIT ENTER TO VALIDATE")
+        mainSizer.Add(wid, proportion=0, flag=wx.ALL|wx.EXPAND, border=2)
+        self.Bind(wx.EVT_TEXT_ENTER, self.on_scedasticity_windows, self.__scedasticityWindowsWid)
         ########################  add all to mainSizer  ########################
         panel.SetSizer(mainSizer)
         ########################  return panel  ########################
@@ -786,7 +1144,7 @@ HIT ENTER TO VALIDATE")
                      help = "Use formula to manipulate all used data. \
 The given formula will be applied on every data file. \
 Keyword 'dataFile' is used to designate the variable in the formula. \
-All numpy functions are allowed and can be called as np.functionName. \
+Numpy mathematical and statistics functions are allowed and can be called as np.functionName. \
 By default, an empty field means data are used as is.\n \
 e.g. np.log10(dataFile) # computes the normal log of all data.\n \
 e.g. np.sin(dataFile) # computes the sin function of all data.\n \
@@ -805,6 +1163,7 @@ HIT ENTER TO VALIDATE")
         #about = wx.Menu()
         browseFiles = file.Append(-1, '&Browse files', 'Browse data files.')
         browseMatrix = file.Append(-1, '&Browse matrix', 'Browse matrix file containing N rows and M columns.')
+        appendFiles  = file.Append(-1, '&Append files', 'Append data files to the end of loaded data.')
         file.AppendSeparator()
         filesParameters = wx.Menu()
         file.AppendMenu(-1, '&Files parameters', filesParameters)
@@ -812,6 +1171,10 @@ HIT ENTER TO VALIDATE")
         grParams  = filesParameters.Append(-1, '&gr', 'gr files parameters')
         sqParams  = filesParameters.Append(-1, '&sq', 'sq files parameters')
         file.AppendSeparator()
+        clearCache = file.Append(-1, '&Clear cache', 'Remove all cached parsed data files.')
+        file.AppendSeparator()
+        report = file.Append(-1, '&Performance report', 'Show stages timing and memory report of this session.')
+        file.AppendSeparator()
         about  = file.Append(-1, 'About', 'About')
         file.AppendSeparator()
         quit = wx.MenuItem(file, -1, '&Quit\tCtrl+Q', 'Quit the Application')
@@ -820,6 +1183,8 @@ HIT ENTER TO VALIDATE")
         # create parameters menu
         params = wx.Menu()
         defDir = params.Append(-1, 'Set default directory', 'Set default directory')
+        cacheSize = params.Append(-1, 'Set cache size', 'Set the maximum size of parsed data cache')
+        resultsCacheSize = params.Append(-1, 'Set results cache size', 'Set the maximum memory size of analysis results cache')
         self.__menubar.Append(params, '&Parameters')
         # set menubar
         self.SetMenuBar(self.__menubar)
@@ -827,23 +1192,32 @@ HIT ENTER TO VALIDATE")
         # bind menus
         self.Bind(wx.EVT_MENU, self.on_browse_files, browseFiles)
         self.Bind(wx.EVT_MENU, self.on_browse_matrix, browseMatrix)
+        self.Bind(wx.EVT_MENU, self.on_append_files, appendFiles)
         self.Bind(wx.EVT_MENU, self.on_quit, quit) 
         self.Bind(wx.EVT_MENU, self.on_chi_file_parameter, chiParams)      
         self.Bind(wx.EVT_MENU, self.on_gr_file_parameter, grParams)   
         self.Bind(wx.EVT_MENU, self.on_sq_file_parameter, sqParams)  
         self.Bind(wx.EVT_MENU, self.on_about, about) 
         self.Bind(wx.EVT_MENU, self.on_default_dir, defDir)         
+        self.Bind(wx.EVT_MENU, self.on_cache_size, cacheSize)         
+        self.Bind(wx.EVT_MENU, self.on_results_cache_size, resultsCacheSize)         
+        self.Bind(wx.EVT_MENU, self.on_clear_cache, clearCache)         
+        self.Bind(wx.EVT_MENU, self.on_performance_report, report)         
     
     def on_use_data_files(self, event):
         newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__useFilesWid.GetValue())
         if newStr is False:
             newStr = self.__useFiles.keys()[0]
+        elif newStr == self.__useFiles.keys()[0]:
+            self.__useFilesWid.ChangeValue(newStr)
+            return
         else:
             self.__useFiles = {}
             self.__useFiles[newStr] = val
         self.__useFilesWid.ChangeValue(newStr)
         if val is not False:
-            self.__set_used_data()
+            self.__set_files_selection()
+            self.__invalidate_used_data()
         else:
             dlg = wx.MessageDialog(self, "Set the data files range to use. \
 By default, an empty field means all data files are used. \
@@ -857,12 +1231,16 @@ or comma separated data indexes (e.g. 0,1,2,100,200,201)",
         newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__ignoreFilesWid.GetValue())
         if newStr is False:
             newStr = self.__ignoreFiles.keys()[0]
+        elif newStr == self.__ignoreFiles.keys()[0]:
+            self.__ignoreFilesWid.ChangeValue(newStr)
+            return
         else:
             self.__ignoreFiles = {}
             self.__ignoreFiles[newStr] = val
         self.__ignoreFilesWid.ChangeValue(newStr)
         if val is not False:
-            self.__set_used_data()
+            self.__set_files_selection()
+            self.__invalidate_used_data()
         else:
             dlg = wx.MessageDialog(self, "Set the data files range to ignore. \
 By default, an empty field means no data files are ignored. \
@@ -876,12 +1254,16 @@ or comma separated data indexes (e.g. 0,1,2,100,200,201).",
         newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__useDataPointsWid.GetValue())
         if newStr is False:
             newStr = self.__useDataPoints.keys()[0]
+        elif newStr == self.__useDataPoints.keys()[0]:
+            self.__useDataPointsWid.ChangeValue(newStr)
+            return
         else:
             self.__useDataPoints = {}
             self.__useDataPoints[newStr] = val
         self.__useDataPointsWid.ChangeValue(newStr)
         if val is not False:
-            self.__set_used_data()
+            self.__set_points_selection()
+            self.__invalidate_used_data()
         else:
             dlg = wx.MessageDialog(self, "Set the data points range to use. \
 By default, an empty field means all data points are used. \
@@ -895,12 +1277,16 @@ or comma separated data indexes (e.g. 0,1,2,100,200,201).",
         newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__ignoreDataPointsWid.GetValue())
         if newStr is False:
             newStr = self.__ignoreDataPoints.keys()[0]
+        elif newStr == self.__ignoreDataPoints.keys()[0]:
+            self.__ignoreDataPointsWid.ChangeValue(newStr)
+            return
         else:
             self.__ignoreDataPoints = {}
             self.__ignoreDataPoints[newStr] = val
         self.__ignoreDataPointsWid.ChangeValue(newStr)
         if val is not False:
-            self.__set_used_data()
+            self.__set_points_selection()
+            self.__invalidate_used_data()
         else:
             dlg = wx.MessageDialog(self, "Set the data points range to ignore. \
 By default, an empty field means no data points are ignored. \
@@ -912,15 +1298,18 @@ or comma separated data indexes (e.g. 0,1,2,100,200,201).",
             
     def on_manipulate_data(self, event):
         formula = str( self.__manipulateDataFormulaWid.GetValue() ).strip()
+        if formula == self.__manipulateDataFormula:
+            return
         if not len(formula):
             self.__manipulateDataFormula = formula    
-            self.__set_used_data()
+            self.__dataFormula           = None
+            self.__invalidate_used_data()
         elif "dataFile" not in formula:
             self.__manipulateDataFormulaWid.ChangeValue(str(self.__manipulateDataFormula))
             dlg = wx.MessageDialog(self, "Use formula to manipulate all used data. \
 The given formula will be applied on every data file. \
 Keyword 'dataFile' is used to designate the variable in the formula. \
-All numpy functions are allowed and can be called as np.functionName. \
+Numpy mathematical and statistics functions are allowed and can be called as np.functionName. \
 By default, an empty field means data are used as is.\n \
 e.g. np.log10(dataFile) # computes the normal log of all data.\n \
 e.g. np.sin(dataFile) # computes the sin function of all data.", 
@@ -928,52 +1317,101 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             result = dlg.ShowModal()
             dlg.Destroy()
         else:
-            dataFile = np.arange(0,10,0.1)
+            # formula is parsed, checked and compiled once then tried on test data
             try:
-                res = eval(formula)
-                assert res.shape == dataFile.shape
-            except:
+                dataFormula = DataFormula(formula)
+                dataFormula.evaluate(np.arange(0,10,0.1).reshape((1,-1)))
+            except Exception as error:
                 self.__manipulateDataFormulaWid.ChangeValue(str(self.__manipulateDataFormula))
+                dlg = wx.MessageDialog(self, "Formula '%s' can't be used. %s"%(formula, error),
+                                       "Wrong formula", wx.OK|wx.ICON_WARNING)
+                result = dlg.ShowModal()
+                dlg.Destroy()
             else:
                 self.__manipulateDataFormula = formula    
-                self.__set_used_data()
+                self.__dataFormula           = dataFormula
+                self.__invalidate_used_data()
+    
+    def __invalidate_used_data(self):
+        # used data are set again from all data only when they are requested
+        self.__usedDataOutdated = True
+    
+    def __update_pipeline(self):
+        # apply pending fields edits and set used data again when outdated.
+        # Analysis results are computed later by whoever requests them.
+        self.__flush_edits()
+        if self.__usedDataOutdated:
+            self.__set_used_data()
+    
+    def __debounce_edit(self, name, function, *args):
+        # call function once name field edits stop for debounce period
+        call = self.__pendingEdits.get(name, None)
+        if call is not None and call.IsRunning():
+            call.Restart(self.__debouncePeriod, *args)
+        else:
+            self.__pendingEdits[name] = wx.CallLater(self.__debouncePeriod, function, *args)
+    
+    def __flush_edits(self):
+        # apply pending fields edits right away
+        pendingEdits        = self.__pendingEdits
+        self.__pendingEdits = {}
+        for call in pendingEdits.values():
+            if call.IsRunning():
+                call.Stop()
+                call.Notify()
+    
+    def __invalidate_analysis(self, parameter):
+        # reset analysis results that depend on the changed parameter only
+        if parameter == "interval":
+            self.__correlation = None
+            self.__scaleSpace  = None
+        if parameter in ("interval", "window", "outOfCore"):
+            self.__scedasticity       = None
+            self.__scedasticityBuffer = None
+            self.__scedasticityLimits = None
+            self.__remove_scedasticity_file()
+        if parameter == "window":
+            self.__intervalsCube = None
+            self.__windowedNorms = None
             
     def __set_used_data(self):
         self.initialize_analysis_data()
+        self.__usedDataOutdated  = False
+        self.__usedDataVersion  += 1
+        self.__usedBuffer        = None
+        self.__normalizedData    = None
+        self.__correlationMatrix = None
+        self.__windowedNorms     = None
         if not len(self.__allData):
-            self.__usedData = []
-            return
-        # set dataUsed
-        npoints = len(self.__allData[0])
-        ndata   = len(self.__allData)
-        # get used data
-        if self.__useFiles.values()[0] is None:
-            useFiles = set(range(ndata))
-        else:
-            useFiles = set(self.__useFiles.values()[0])
-        if self.__ignoreFiles.values()[0] is None:
-            ignoreFiles = set([])
-        else:
-            ignoreFiles = set(self.__ignoreFiles.values()[0])
-        useFiles = sorted(useFiles-ignoreFiles)
-        data = [self.__allData[idx] for idx in useFiles if idx<ndata]
-        # get used points
-        if self.__useDataPoints.values()[0] is None:
-            usePoints = set(range(npoints))
-        else:
-            usePoints = set(self.__useDataPoints.values()[0])
-        if self.__ignoreDataPoints.values()[0] is None:
-            ignorePoints = set([])
-        else:
-            ignorePoints = set(self.__ignoreDataPoints.values()[0])
-        useFiles = np.array([idx for idx in sorted(usePoints-ignorePoints) if idx < npoints], dtype=np.int)
-        # apply formula
-        if len(self.__manipulateDataFormula):
-            self.__usedData = []
-            for dataFile in data:
-                self.__usedData.append( eval(self.__manipulateDataFormula) )  
+            self.__usedFilesIndexes  = None
+            self.__usedPointsIndexes = None
+            self.__usedData = np.zeros((0,0), dtype=np.float32)
+            return
+        # get used data, a view of all data when nothing or evenly spaced indexes are selected
+        with self.__profiler.measure("selection", allData=self.__allData) as measure:
+            data = self.__select_used_data()
+            measure.add_array("data", data)
+        # apply formula, result is kept by formula for the same data version, selection and formula
+        if self.__dataFormula is not None:
+            with self.__profiler.measure("formula", data=data) as measure:
+                self.__usedData = self.__dataFormula.evaluate(data, key=self.__get_result_key("formula"))
+                measure.add_array("usedData", self.__usedData)
         else:
-            self.__usedData = [d[useFiles] for d in data]  
+            self.__usedData = data
+    
+    def __set_files_selection(self):
+        self.__filesSelection = IndexSelection(self.__useFiles.values()[0], self.__ignoreFiles.values()[0])
+    
+    def __set_points_selection(self):
+        self.__pointsSelection = IndexSelection(self.__useDataPoints.values()[0], self.__ignoreDataPoints.values()[0])
+        
+    def __select_used_data(self):
+        # set used files and points indexes and return selected data. Indexes are
+        # slices when evenly spaced and data are then selected without copying
+        ndata, npoints = self.__allData.shape
+        self.__usedFilesIndexes  = self.__filesSelection.get_index(ndata)
+        self.__usedPointsIndexes = self.__pointsSelection.get_index(npoints)
+        return GET_SELECTED_DATA(self.__allData, rows=self.__usedFilesIndexes, columns=self.__usedPointsIndexes)
         
     def on_default_dir(self, event):
         dialog = wx.DirDialog (None, 
@@ -993,14 +1431,70 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
         else:
             return
             
+    def on_cache_size(self, event):
+        dialog = wx.TextEntryDialog(self, 
+                                    message = "Set the maximum size in MB of parsed data cache. Cache is disabled when 0.\nCache directory is '%s'"%self.__spectraCache.directory,
+                                    caption = "Set cache size",
+                                    defaultValue = str(int(self.__spectraCache.maximumSize/1024**2)))
+        returned = dialog.ShowModal()
+        value    = dialog.GetValue()
+        dialog.Destroy()
+        if returned != wx.ID_OK:
+            return
+        try:
+            value = int(value)
+            assert value>=0
+        except:
+            dlg = wx.MessageDialog(self, "Cache size must be a positive integer.",
+                  "Wrong cache size", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        globals()["CACHE_SIZE"] = value
+        self.__spectraCache.set_maximum_size(value*1024**2)
+        SET_GENERAL_PARAMETERS(cachesize = value)
+    
+    def on_results_cache_size(self, event):
+        dialog = wx.TextEntryDialog(self, 
+                                    message = "Set the maximum memory size in MB of analysis results cache. Cache is disabled when 0.",
+                                    caption = "Set results cache size",
+                                    defaultValue = str(int(self.__resultsCache.maximumSize/1024**2)))
+        returned = dialog.ShowModal()
+        value    = dialog.GetValue()
+        dialog.Destroy()
+        if returned != wx.ID_OK:
+            return
+        try:
+            value = int(value)
+            assert value>=0
+        except:
+            dlg = wx.MessageDialog(self, "Results cache size must be a positive integer.",
+                  "Wrong cache size", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        globals()["RESULTS_CACHE_SIZE"] = value
+        self.__resultsCache.set_maximum_size(value*1024**2)
+        SET_GENERAL_PARAMETERS(resultscachesize = value)
+    
+    def on_clear_cache(self, event):
+        self.__spectraCache.clear()
+            
     def on_about(self, event):
         About().ShowModal()
     
+    def on_performance_report(self, event):
+        dialog = PerformanceReport(self.__profiler)
+        dialog.ShowModal()
+        dialog.Destroy()
+    
     def on_browse_matrix(self, event):
         # create browsing dialog
         wildcard = "All files (*.*)|*.*|"+\
                    "data files (*.dat)|*.dat|"+\
-                   "text files (*.txt)|*.txt"           
+                   "text files (*.txt)|*.txt|"+\
+                   "numpy files (*.npy)|*.npy|"+\
+                   "raw binary files (*.raw;*.bin)|*.raw;*.bin"           
         dialog = wx.FileDialog(None, message="Browse files", 
                                      defaultDir=DEFAULT_DIR, 
                                      defaultFile="", 
@@ -1013,21 +1507,56 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             files = [os.path.normpath(str(p)) for p in dialog.GetPaths()]
         else:
             return
+        # get raw binary matrix description
+        isBinary = IS_BINARY_MATRIX_FILE(files[0])
+        if isBinary and not files[0].lower().endswith(".npy"):
+            if not self.__get_raw_matrix_description():
+                return
         # set matrixFile flag
         self.__matrixFile = True
         # update widget
         self.populate_files(files)
         # Set active
-        self.__commentWid.Enable(True)
-        self.__delimiterWid.Enable(True)
-        self.__headerLinesWid.Enable(True)
-        self.__footerLinesWid.Enable(True)
+        self.__commentWid.Enable(not isBinary)
+        self.__delimiterWid.Enable(not isBinary)
+        self.__headerLinesWid.Enable(not isBinary)
+        self.__footerLinesWid.Enable(not isBinary)
         self.__useColumnWid.Enable(False)
         self.__readColumnWiseWid.Enable(True)
         # set plot options enabled
         #self.__compareSelectedDataBut.Enable(not self.__matrixFile)
         #self.__plotSelectedDataBut.Enable(not self.__matrixFile)
             
+    def __get_raw_matrix_description(self):
+        if self.__rawMatrixShape is None:
+            defaultValue = "0, 0, %s"%self.__rawMatrixType
+        else:
+            defaultValue = "%i, %i, %s"%(self.__rawMatrixShape[0], self.__rawMatrixShape[1], self.__rawMatrixType)
+        dialog = wx.TextEntryDialog(self, 
+                                    message = "Raw binary matrix is little endian data of N lines and M columns.\nGive 'lines, columns, type' where type is float32 or float64",
+                                    caption = "Raw matrix description",
+                                    defaultValue = defaultValue)
+        returned = dialog.ShowModal()
+        value    = dialog.GetValue()
+        dialog.Destroy()
+        if returned != wx.ID_OK:
+            return False
+        try:
+            lines, columns, dtype = [v.strip() for v in str(value).split(",")]
+            lines   = int(lines)
+            columns = int(columns)
+            assert lines>0 and columns>0
+            assert dtype in ("float32", "float64")
+        except:
+            dlg = wx.MessageDialog(self, "Raw matrix description must be 'lines, columns, type' where lines and columns are positive integers and type is float32 or float64.",
+                  "Wrong matrix description", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return False
+        self.__rawMatrixShape = (lines, columns)
+        self.__rawMatrixType  = dtype
+        return True
+        
     def on_browse_files(self, event):
         # create browsing dialog
         wildcard = "All files (*.*)|*.*|"+\
@@ -1087,6 +1616,7 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             self.__moveDownWid.Enable(selected[-1]<len(self.__files)-1)
                 
     def on_quit(self, event):
+        self.__remove_scedasticity_file()
         exit()
         
     def on_comment(self, event):
@@ -1136,29 +1666,45 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
     
     def on_read_column_wise(self, event):
         self.__readColumnWise = self.__readColumnWiseWid.GetValue()
+    
+    def on_read_workers(self, event):
+        try:
+            val = event.GetEventObject().GetValue()
+            val = int(val)  
+        except:
+            val = None           
+        if val<=0:
+            val = None
+        if val is None:
+            event.GetEventObject().ChangeValue(str(self.__readWorkers))      
+        else:            
+            self.__readWorkers = val
         
     def on_scedasticity_window_size(self, event):
+        self.__debounce_edit("window", self.__set_scedasticity_window_size, event.GetEventObject())
+        
+    def __set_scedasticity_window_size(self, widget):
         try:
-            val = event.GetEventObject().GetValue()
+            val = widget.GetValue()
             val = int(val)  
         except:
             val = None           
         if val<=0:
             val = None
         if val is None:
-            event.GetEventObject().ChangeValue(str(self.__scedasticityWindowSize))      
+            widget.ChangeValue(str(self.__scedasticityWindowSize))      
         elif val % 2 == 0:
             val -= 1
-            event.GetEventObject().ChangeValue(str(val))  
+            widget.ChangeValue(str(val))  
             self.__scedasticityWindowSize = val  
             # reset calculations
-            self.initialize_analysis_data()            
+            self.__invalidate_analysis("window")            
         else:            
             self.__scedasticityWindowSize = val
             # reset calculations
-            self.initialize_analysis_data()
+            self.__invalidate_analysis("window")
 
-    def on_files_interval(self, event):
+    def on_computation_workers(self, event):
         try:
             val = event.GetEventObject().GetValue()
             val = int(val)  
@@ -1167,11 +1713,106 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
         if val<=0:
             val = None
         if val is None:
-            event.GetEventObject().ChangeValue(str(self.__filesInterval))      
+            event.GetEventObject().ChangeValue(str(self.__computationWorkers))      
+        else:
+            self.__computationWorkers = val
+    
+    def on_out_of_core(self, event):
+        self.__outOfCore = self.__outOfCoreWid.GetValue()
+        # reset calculations
+        self.__invalidate_analysis("outOfCore")
+    
+    def on_memory_budget(self, event):
+        try:
+            val = event.GetEventObject().GetValue()
+            val = int(val)  
+        except:
+            val = None           
+        if val<=0:
+            val = None
+        if val is None:
+            event.GetEventObject().ChangeValue(str(self.__memoryBudget))      
+        else:
+            self.__memoryBudget = val
+            
+    def on_files_interval(self, event):
+        self.__debounce_edit("interval", self.__set_files_interval, event.GetEventObject())
+        
+    def __set_files_interval(self, widget):
+        try:
+            val = widget.GetValue()
+            val = int(val)  
+        except:
+            val = None           
+        if val<=0:
+            val = None
+        if val is None:
+            widget.ChangeValue(str(self.__filesInterval))      
         else:
             self.__filesInterval = val
             # reset calculations
-            self.initialize_analysis_data()
+            self.__invalidate_analysis("interval")
+            
+    def on_correlation_lags(self, event):
+        newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__correlationLagsWid.GetValue())
+        if val is not False and val is not None and 0 in val:
+            newStr, val = False, False
+        if newStr is False:
+            newStr = self.__correlationLags.keys()[0]
+        else:
+            self.__correlationLags = {}
+            self.__correlationLags[newStr] = val
+        self.__correlationLagsWid.ChangeValue(newStr)
+        if val is False:
+            dlg = wx.MessageDialog(self, "Set the files intervals to compute correlation curves for. \
+Entry can be a real range such as from:to:step (e.g. 1:10:1), \
+or comma separated positive non-zero intervals (e.g. 1,2,5,10).", 
+            "Wrong lags", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            
+    def on_scedasticity_intervals(self, event):
+        newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__scedasticityIntervalsWid.GetValue())
+        if val is not False and val is not None and 0 in val:
+            newStr, val = False, False
+        if newStr is False:
+            newStr = self.__scedasticityIntervals.keys()[0]
+        else:
+            self.__scedasticityIntervals = {}
+            self.__scedasticityIntervals[newStr] = val
+            self.__intervalsCube = None
+        self.__scedasticityIntervalsWid.ChangeValue(newStr)
+        if val is False:
+            dlg = wx.MessageDialog(self, "Set the files intervals to compute scedasticity intervals cube for. \
+Entry can be a real range such as from:to:step (e.g. 1:10:1), \
+or comma separated positive non-zero intervals (e.g. 1,2,5,10).", 
+            "Wrong intervals", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            
+    def on_scedasticity_windows(self, event):
+        newStr, val = GET_INDEX_RANGE_FROM_STRING(self.__scedasticityWindowsWid.GetValue())
+        if val is not False and val is not None:
+            if 0 in val:
+                newStr, val = False, False
+            else:
+                # odd window sizes only
+                val    = sorted(set([v-1+v%2 for v in val]))
+                newStr = ", ".join(["%i"%v for v in val])
+        if newStr is False:
+            newStr = self.__scedasticityWindows.keys()[0]
+        else:
+            self.__scedasticityWindows = {}
+            self.__scedasticityWindows[newStr] = val
+            self.__scaleSpace = None
+        self.__scedasticityWindowsWid.ChangeValue(newStr)
+        if val is False:
+            dlg = wx.MessageDialog(self, "Set the window sizes to compute scedasticity scale-space for. \
+Entry can be a real range such as from:to:step (e.g. 5:101:10), \
+or comma separated positive non-zero sizes (e.g. 11,25,51,101).", 
+            "Wrong windows", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
             
     def on_move_down(self, event):
         selected = self.__filesWid.GetSelections()
@@ -1258,36 +1899,144 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             result = dlg.ShowModal()
             dlg.Destroy()
             return
-        data    = []
-        count   = 0
-        self.__progressBar.SetValue(0) 
-        self.__progressBar.SetRange(len(self.__files))
-        vectLen = None
+        if self.__is_task_running():
+            return
+        # read files in a background task
+        files      = list(self.__files)
+        matrixFile = self.__matrixFile
+        parameters = {"comment":self.__comment, "delimiter":self.__delimiter,
+                      "headerLines":self.__headerLines, "footerLines":self.__footerLines,
+                      "useColumn":self.__useColumn, "readColumnWise":self.__readColumnWise,
+                      "readWorkers":self.__readWorkers, "rawMatrixShape":self.__rawMatrixShape,
+                      "rawMatrixType":self.__rawMatrixType}
+        self.__start_task("Loading data", self.__load_data, args=(files, matrixFile, parameters), 
+                          onDone = lambda result: self.__on_data_read(files, matrixFile, result),
+                          total  = len(files))
+    
+    def __load_data(self, files, matrixFile, parameters, progress=None):
+        # read data measuring load stage
+        with self.__profiler.measure("load") as measure:
+            result = self.__read_data(files, matrixFile, parameters, progress=progress)
+            if result[0] is not None:
+                measure.add_array("data", result[0])
+        return result
+        
+    def __read_data(self, files, matrixFile, parameters, progress=None):
+        # read matrix file or vector files and return data, data buffer, unread
+        # files and warning messages. Data is None when matrix file can't be read.
+        # No data state is changed and it can run in a background task.
+        if progress is None:
+            progress = lambda done, total: None
+        data        = None
+        dataBuffer  = None
         unreadFiles = []
+        warnMsgs    = []
         # load single matrix file
-        if self.__matrixFile:
+        if matrixFile:
             try:
-                f = self.__files[0]
-                d = np.genfromtxt(f, dtype = np.float32,
-                                   comments    = self.__comment, 
-                                   delimiter   = self.__delimiter, 
-                                   skip_header = self.__headerLines,
-                                   skip_footer = self.__footerLines)
-                assert len(d.shape) == 2, "matrix should have N lines and M columns"
+                f = files[0]
+                d = None
+                if IS_BINARY_MATRIX_FILE(f):
+                    # memory map binary matrix, only used rows are read from disk
+                    d = READ_BINARY_MATRIX_FILE(f, shape=parameters["rawMatrixShape"], dtype=parameters["rawMatrixType"])
+                    if parameters["readColumnWise"]:
+                        d = d.T
+                elif self.__spectraCache.maximumSize > 0:
+                    key = self.__spectraCache.get_key(f, comment        = parameters["comment"], 
+                                                         delimiter      = parameters["delimiter"], 
+                                                         headerLines    = parameters["headerLines"],
+                                                         footerLines    = parameters["footerLines"],
+                                                         readColumnWise = parameters["readColumnWise"])
+                    d = self.__spectraCache.get(key)
+                if d is None:
+                    with self.__profiler.measure("parse") as measure:
+                        d = READ_MATRIX_FILE(f, comment     = parameters["comment"], 
+                                                delimiter   = parameters["delimiter"], 
+                                                headerLines = parameters["headerLines"],
+                                                footerLines = parameters["footerLines"])
+                        measure.add_array("data", d)
+                    # every data file is a matrix row
+                    if parameters["readColumnWise"]:
+                        d = d.T
+                    d = np.ascontiguousarray(d, dtype=np.float32)
+                    if self.__spectraCache.maximumSize > 0:
+                        self.__spectraCache.set(key, d)
+                        self.__spectraCache.evict()
             except Exception as e:
                 unreadFiles.append(f)
-                warnings.warn("file %s can't be read. %s"%(f,e))
-                dlg = wx.MessageDialog(self, "file %s can't be read. %s"%(f,e),
-                                             "Reading error", wx.OK|wx.ICON_ERROR)
-                result = dlg.ShowModal()
-                dlg.Destroy()
+                message = "file %s can't be read. %s"%(f,e)
+                warnings.warn(message)
+                warnMsgs.append(message)
             else:
-                # cast vectors length
-                if not self.__readColumnWise:
-                    self.__allData = [d[idx,:] for idx in range(d.shape[0])]
-                else:
-                    self.__allData = [d[:,idx] for idx in range(d.shape[1])]
-                
+                # binary matrices stay memory mapped
+                data = d
+            progress(1, 1)
+            return data, dataBuffer, unreadFiles, warnMsgs
+        # load vector files
+        if self.__spectraCache.maximumSize > 0:
+            cache = self.__spectraCache
+        else:
+            cache = None
+        results = READ_VECTOR_FILES(files, workers     = parameters["readWorkers"],
+                                           cache       = cache,
+                                           comment     = parameters["comment"], 
+                                           delimiter   = parameters["delimiter"], 
+                                           headerLines = parameters["headerLines"],
+                                           footerLines = parameters["footerLines"],
+                                           useColumn   = parameters["useColumn"])
+        vectLen = None
+        nrows   = 0
+        # parse stage includes cached files loading
+        with self.__profiler.measure("parse") as measure:
+            try:
+                for count, (f, d, error) in enumerate(results):
+                    if d is None:
+                        unreadFiles.append(f)
+                        message = "file %s can't be read. %s"%(f,error)
+                        warnings.warn(message)
+                        warnMsgs.append(message)     
+                    else:
+                        if vectLen is None:
+                            vectLen = len(d)
+                            # allocate all data matrix once
+                            data = np.empty((len(files), vectLen), dtype=np.float32)
+                        elif vectLen != len(d):
+                            message = "file %s length is found to be different than the rest of files"%(f)
+                            warnings.warn(message)
+                            warnMsgs.append(message)
+                        if len(d) < vectLen:
+                            unreadFiles.append(f)
+                        else:
+                            data[nrows,:] = d[:vectLen]
+                            nrows += 1
+                    # update progress, cancelling stops reading
+                    progress(count+1, len(files))
+            finally:
+                results.close()
+            if data is not None:
+                measure.add_array("data", data[:nrows])
+        # keep read files rows only
+        if data is None:
+            data = np.zeros((0,0), dtype=np.float32)
+        else:
+            dataBuffer = RowsBuffer(data, nrows)
+            data       = dataBuffer.data
+        return data, dataBuffer, unreadFiles, warnMsgs
+    
+    def __on_data_read(self, files, matrixFile, result):
+        data, dataBuffer, unreadFiles, warnMsgs = result
+        if files != self.__files or matrixFile != self.__matrixFile:
+            warnings.warn("files list changed while loading, read data are discarded.")
+            dlg = wx.MessageDialog(self, "Files list changed while loading. Read data are discarded, load data again.",
+                  "Files changed", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        if data is not None:
+            self.__allData      = data
+            self.__dataBuffer   = dataBuffer
+            self.__dataVersion += 1
+            if matrixFile:
                 # create files list    
                 #self.__files = [f for f in files if os.path.isfile(f) and os.access(f, os.R_OK)]
                 # update widget
@@ -1296,65 +2045,412 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
                     [self.__filesWid.Insert("%i --> "%idx+"matrix data loaded column wise", idx) for idx in range(len(self.__allData))]
                 else: 
                     [self.__filesWid.Insert("%i --> "%idx+"matrix data loaded row wise", idx) for idx in range(len(self.__allData))]
-                             
-        # load vector files
-        else:
-            warnMsgs = []
-            for f in self.__files:
-                try:
-                    d = np.genfromtxt(f, dtype    = np.float32,
-                                      comments    = self.__comment, 
-                                      delimiter   = self.__delimiter, 
-                                      skip_header = self.__headerLines,
-                                      skip_footer = self.__footerLines,
-                                      usecols     = self.__useColumn)
-                    assert len(d), "file must have data"
-                except Exception as e:
-                    unreadFiles.append(f)
-                    message = "file %s can't be read. %s"%(f,e)
-                    warnings.warn(message)
-                    warnMsgs.append(message)     
-                else:
-                    if vectLen is None:
-                        vectLen = len(d)
-                    elif vectLen != len(d):
-                        message = "file %s length is found to be different than the rest of files"%(f)
-                        warnings.warn(message)
-                        warnMsgs.append(message)
-                    data.append(d)
-                # update progress    
-                count += 1
-                self.__progressBar.SetValue(count)
-            # cast vectors length
-            self.__allData  = [d[:vectLen] for d in data]
-            # warn when needed
-            if len(warnMsgs):
-                message = ""
-                if len(warnMsgs)>3: 
-                    warnMsgs=[warnMsgs[idx] for idx in range(3)]
-                    message = "ONLY FIRST 3 WARNINGS ARE SHOWN HERE, PLEASE LOOK AT TERMINAL \n\n"
-                for m in warnMsgs:
-                    message += m + "\n"                
-                dlg = wx.MessageDialog(self, message,
-                      "No data found", wx.OK|wx.ICON_WARNING)
-                result = dlg.ShowModal()
-                dlg.Destroy()
+        # warn when needed
+        if len(warnMsgs):
+            message = ""
+            if len(warnMsgs)>3: 
+                warnMsgs=[warnMsgs[idx] for idx in range(3)]
+                message = "ONLY FIRST 3 WARNINGS ARE SHOWN HERE, PLEASE LOOK AT TERMINAL \n\n"
+            for m in warnMsgs:
+                message += m + "\n"                
+            dlg = wx.MessageDialog(self, message,
+                  "No data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
         # warn unread files
         if len(unreadFiles):
             dlg = wx.MessageDialog(self, "The following files were skipped because an error is encountered upon reading.\n%s\n"%("\n".join(unreadFiles)),
                   "Files skipped", wx.OK|wx.ICON_WARNING)
             result = dlg.ShowModal()
             dlg.Destroy()
-        # set used data
-        self.__set_used_data()
-        # reset calculations
-        self.initialize_analysis_data()
         # reset data manipulation
         self.initialize_data_manipulation()
+        # reset calculations, used data are set when requested
+        self.initialize_analysis_data()
+        self.__invalidate_used_data()
         # reset progress bar
-        self.__progressBar.SetValue(len(self.__files))    
+        self.__progressBar.SetValue(self.__progressBar.GetRange())
+    
+    def __is_task_running(self):
+        # warn and return True when a background task is running
+        if self.__task is None:
+            return False
+        warnings.warn("%s is running."%self.__taskTitle)
+        dlg = wx.MessageDialog(self, "%s is running. Wait for it to finish or cancel it first."%self.__taskTitle,
+              "Task running", wx.OK|wx.ICON_WARNING)
+        result = dlg.ShowModal()
+        dlg.Destroy()
+        return True
+        
+    def __start_task(self, title, function, args, onDone, total):
+        # run function in a background thread. Progress is posted to the
+        # progress bar and onDone is called with function result in the main thread
+        if self.__is_task_running():
+            return
+        self.__progressBar.SetValue(0)  
+        self.__progressBar.SetRange(max(total,1))
+        self.__cancelTaskBut.Enable(True)
+        self.SetStatusText("%s ..."%title)
+        self.__taskTitle = title
+        self.__task = BackgroundTask(function, args = args,
+                                     onProgress = lambda done, total: wx.CallAfter(self.__on_task_progress, done, total),
+                                     onDone     = lambda result: wx.CallAfter(self.__on_task_done, onDone, result),
+                                     onCancel   = lambda: wx.CallAfter(self.__on_task_cancelled),
+                                     onError    = lambda error: wx.CallAfter(self.__on_task_error, error))
+        self.__task.start()
+    
+    def __stop_task(self, status):
+        self.__task = None
+        self.__cancelTaskBut.Enable(False)
+        self.SetStatusText(status)
+        
+    def __on_task_progress(self, done, total):
+        if self.__progressBar.GetRange() != max(total,1):
+            self.__progressBar.SetRange(max(total,1))
+        self.__progressBar.SetValue(done)
+        
+    def __on_task_done(self, onDone, result):
+        self.__stop_task("%s done"%self.__taskTitle)
+        self.__progressBar.SetValue(self.__progressBar.GetRange())
+        onDone(result)
+    
+    def __on_task_cancelled(self):
+        self.__stop_task("%s cancelled"%self.__taskTitle)
+        self.__progressBar.SetValue(0)
+    
+    def __on_task_error(self, error):
+        self.__stop_task("%s failed"%self.__taskTitle)
+        self.__progressBar.SetValue(0)
+        warnings.warn("%s failed. %s"%(self.__taskTitle, error))
+        dlg = wx.MessageDialog(self, "%s failed. %s"%(self.__taskTitle, error),
+              "Task error", wx.OK|wx.ICON_ERROR)
+        result = dlg.ShowModal()
+        dlg.Destroy()
+    
+    def on_cancel_task(self, event):
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        self.SetStatusText("Cancelling %s ..."%self.__taskTitle.lower())
    
+    def on_append_files(self, event):
+        if not len(self.__allData) or self.__matrixFile:
+            warnings.warn("must load data files first.")
+            dlg = wx.MessageDialog(self, "Files can only be appended to loaded data files.",
+                  "No data files found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        if self.__is_task_running():
+            return
+        wildcard = "All files (*.*)|*.*|"+\
+                   "Chi files (*.chi)|*.chi|"+\
+                   "gr files (*.gr)|*.gr|"+\
+                   "sq files (*.sq)|*.sq|"+\
+                   "data files (*.dat)|*.dat|"+\
+                   "text files (*.txt)|*.txt"           
+        dialog = wx.FileDialog(None, message="Append files", 
+                                     defaultDir=DEFAULT_DIR, 
+                                     defaultFile="", 
+                                     wildcard=wildcard,
+                                     style=wx.OPEN|wx.FD_MULTIPLE)
+        returned = dialog.ShowModal() 
+        globals()["DEFAULT_DIR"] = dialog.GetDirectory()
+        dialog.Destroy()
+        if returned != wx.ID_OK:
+            return
+        files = [os.path.normpath(str(p)) for p in dialog.GetPaths()]
+        self.append_files(files)
+            
+    def append_files(self, files, workers=None, showUnread=True):
+        # read files with current read parameters in a background task and
+        # append them to the end of loaded data. Used data, correlation and
+        # scedasticity are extended with the appended files only. workers is
+        # the number of reading processes and defaults to read workers.
+        files = [f for f in files if os.path.isfile(f) and os.access(f, os.R_OK)]
+        if not len(files):
+            return
+        if workers is None:
+            workers = self.__readWorkers
+        parameters = {"comment":self.__comment, "delimiter":self.__delimiter,
+                      "headerLines":self.__headerLines, "footerLines":self.__footerLines,
+                      "useColumn":self.__useColumn}
+        self.__start_task("Appending files", self.__read_appended_files, args=(files, workers, parameters), 
+                          onDone = lambda results: self.__on_appended_files_read(results, showUnread),
+                          total  = len(files))
+    
+    def __read_appended_files(self, files, workers, parameters, progress=None):
+        # read files and return (path, data, error) of every file. No data
+        # state is changed and it can run in a background task.
+        if progress is None:
+            progress = lambda done, total: None
+        if self.__spectraCache.maximumSize > 0:
+            cache = self.__spectraCache
+        else:
+            cache = None
+        results = []
+        reader  = READ_VECTOR_FILES(files, workers=workers, cache=cache, **parameters)
+        try:
+            for count, result in enumerate(reader):
+                results.append(result)
+                # update progress, cancelling stops reading
+                progress(count+1, len(files))
+        finally:
+            reader.close()
+        return results
+    
+    def __on_appended_files_read(self, results, showUnread=True):
+        unreadFiles = self.__append_read_files(results)
+        self.__plotsOutdated = True
+        self.__refresh_outdated_live_plots()
+        # warn unread files
+        if showUnread and len(unreadFiles):
+            dlg = wx.MessageDialog(self, "The following files were skipped because an error is encountered upon reading.\n%s\n"%("\n".join(unreadFiles)),
+                  "Files skipped", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+    
+    def __append_read_files(self, results):
+        # append read files data to all data and return unread files list
+        if len(self.__allData):
+            vectLen = self.__allData.shape[1]
+        else:
+            vectLen = None
+        rows        = []
+        readFiles   = []
+        unreadFiles = []
+        for f, d, error in results:
+            if d is None:
+                warnings.warn("file %s can't be read. %s"%(f,error))
+                unreadFiles.append(f)
+                continue
+            if vectLen is None:
+                vectLen = len(d)
+            if len(d) < vectLen:
+                warnings.warn("file %s length is found to be different than the rest of files"%(f))
+                unreadFiles.append(f)
+            else:
+                if len(d) > vectLen:
+                    warnings.warn("file %s length is found to be different than the rest of files"%(f))
+                rows.append(d[:vectLen])
+                readFiles.append(f)
+        if not len(rows):
+            return unreadFiles
+        # append to all data
+        ndata = len(self.__allData)
+        if not ndata:
+            self.__dataBuffer = RowsBuffer(np.array(rows, dtype=np.float32))
+        elif self.__dataBuffer is None:
+            self.__dataBuffer = RowsBuffer(self.__allData)
+            self.__dataBuffer.append(rows)
+        else:
+            self.__dataBuffer.append(rows)
+        self.__allData      = self.__dataBuffer.data
+        self.__dataVersion += 1
+        # update files
+        if not ndata:
+            self.__files = []
+            self.__filesWid.Clear()
+        for f in readFiles:
+            self.__filesWid.Insert("%i --> "%len(self.__files)+str(f), len(self.__files))
+            self.__files.append(f)
+        self.__LoadData.Enable(True)
+        if not ndata or self.__usedDataOutdated:
+            self.__invalidate_used_data()
+            return unreadFiles
+        # extend used data and analysis
+        nused = len(self.__usedData)
+        self.__extend_used_data(ndata)
+        self.__extend_analysis_data(nused)
+        return unreadFiles
+    
+    def __extend_used_data(self, ndata):
+        # add used rows of all data appended after row ndata
+        if self.__filesSelection.selectsAll and self.__pointsSelection.selectsAll and self.__dataFormula is None:
+            self.__usedData = self.__allData
+            return
+        # get appended used files
+        useFiles = self.__filesSelection.get_indexes(len(self.__allData), start=ndata)
+        if not len(useFiles):
+            return
+        self.__usedFilesIndexes = self.__filesSelection.get_index(len(self.__allData))
+        # get appended used data
+        data = GET_SELECTED_DATA(self.__allData, rows=useFiles, columns=self.__usedPointsIndexes)
+        if self.__dataFormula is not None:
+            data = self.__dataFormula.evaluate(data)
+        if self.__usedBuffer is None:
+            self.__usedBuffer = RowsBuffer(self.__usedData)
+        self.__usedData = self.__usedBuffer.append(data)
+    
+    def __extend_analysis_data(self, nused):
+        # compute correlation and scedasticity of used rows appended after row nused.
+        # Cached normalized data and windowed norms are extended, otherwise they
+        # are computed for the rows needed by the appended rows only.
+        if nused == len(self.__usedData):
+            return
+        self.__correlationMatrix = None
+        self.__scaleSpace        = None
+        self.__intervalsCube     = None
+        if self.__windowedNorms is not None:
+            self.__windowedNorms.append( GET_WINDOWED_NORMS(self.__usedData[nused:], int(self.__scedasticityWindowSize/2)) )
+        if self.__normalizedData is not None:
+            self.__normalizedData.append( GET_NORMALIZED_DATA(self.__usedData[nused:]) )
+        if self.__correlation is not None:
+            start = max(0, nused-self.__filesInterval)
+            if self.__normalizedData is not None:
+                normalized = self.__normalizedData.data[start:]
+            else:
+                normalized = GET_NORMALIZED_DATA(self.__usedData[start:])
+            correlation = GET_LAGS_CORRELATION(normalized, [self.__filesInterval])[0]
+            self.__correlation = np.concatenate([self.__correlation, correlation])
+        if self.__scedasticityBuffer is not None:
+            halfwindow = int(float(self.__scedasticityWindowSize)/2)
+            start      = max(0, nused-self.__filesInterval)
+            norms      = self.__get_windowed_norms()
+            if norms is not None:
+                norms = norms[start:]
+            rows       = GET_SCEDASTICITY_MAP(self.__usedData[start:], self.__filesInterval, halfwindow, norms=norms)
+            self.__scedasticity       = self.__scedasticityBuffer.append(rows)
+            self.__scedasticityLimits = GET_NAN_LIMITS(rows, self.__scedasticityLimits)
+        elif self.__scedasticityFile is not None and self.__scedasticity is not None:
+            # out of core scedasticity rows are appended to its file
+            halfwindow = int(float(self.__scedasticityWindowSize)/2)
+            start      = max(0, nused-self.__filesInterval)
+            rows       = GET_SCEDASTICITY_MAP(self.__usedData[start:], self.__filesInterval, halfwindow)
+            self.__append_scedasticity_file(rows)
+            self.__scedasticityLimits = GET_NAN_LIMITS(rows, self.__scedasticityLimits)
+    
+    def __append_scedasticity_file(self, rows):
+        # write rows at the end of out of core scedasticity file and map it again.
+        # Maps of opened plots stay valid.
+        with open(self.__scedasticityFile, "ab") as fd:
+            np.ascontiguousarray(rows, dtype=np.float32).tofile(fd)
+        shape = (len(self.__scedasticity)+len(rows), self.__scedasticity.shape[1])
+        self.__scedasticity = np.memmap(self.__scedasticityFile, dtype=np.float32, mode="r", shape=shape)
+    
+    def on_browse_watch_directory(self, event):
+        dialog = wx.DirDialog (None, 
+                               message = "Choose directory to watch",
+                               defaultPath=self.__watchDirectoryWid.GetValue(), 
+                               style=wx.DD_DEFAULT_STYLE | wx.DD_DIR_MUST_EXIST)
+        returned = dialog.ShowModal() 
+        if returned == wx.ID_OK:
+            self.__watchDirectoryWid.ChangeValue(os.path.abspath(dialog.GetPath()))
+        dialog.Destroy()
+    
+    def on_watch(self, event):
+        if not self.__watchWid.GetValue():
+            self.stop_watch()
+            return
+        directory = str(self.__watchDirectoryWid.GetValue()).strip()
+        pattern   = str(self.__watchPatternWid.GetValue()).strip()
+        if self.__matrixFile and len(self.__allData):
+            message = "Files can't be appended to matrix data."
+        elif not os.path.isdir(directory):
+            message = "Directory '%s' is not found."%directory
+        elif not len(pattern):
+            message = "Files pattern must be given."
+        else:
+            message = None
+        if message is not None:
+            self.__watchWid.SetValue(False)
+            dlg = wx.MessageDialog(self, message, "Can't watch directory", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        self.__watcher = DirectoryWatcher(directory, pattern)
+        self.__watchDirectoryWid.Enable(False)
+        self.__watchBrowseWid.Enable(False)
+        self.__watchPatternWid.Enable(False)
+        self.__watchWid.SetLabel("Stop watching")
+        self.__watchTimer.Start(self.__watchPeriod)
+        
+    def stop_watch(self):
+        self.__watchTimer.Stop()
+        self.__watcher = None
+        self.__watchWid.SetValue(False)
+        self.__watchWid.SetLabel("Watch")
+        self.__watchDirectoryWid.Enable(True)
+        self.__watchBrowseWid.Enable(True)
+        self.__watchPatternWid.Enable(True)
+    
+    def on_watch_timer(self, event):
+        # new files are appended once running task is done
+        if self.__watcher is None or self.__task is not None:
+            return
+        try:
+            files = self.__watcher.poll()
+        except OSError as e:
+            self.stop_watch()
+            warnings.warn("watched directory can't be read. %s"%e)
+            return
+        if len(files):
+            # few files are found at every poll, a pool of reading processes isn't worth starting
+            self.__matrixFile = False
+            self.append_files(files, workers=1, showUnread=False)
+            return
+        self.__refresh_outdated_live_plots()
+    
+    def __refresh_outdated_live_plots(self):
+        # refresh live plots no more than once every refresh period
+        if self.__plotsOutdated and 1000*(time.time()-self.__plotsRefreshTime) >= self.__plotsRefreshPeriod:
+            self.refresh_live_plots()
+    
+    def refresh_live_plots(self):
+        # refresh live plots with computed results extended with appended data.
+        # Nothing is computed again from scratch, plots of results that aren't
+        # computed are kept as they are.
+        self.__update_pipeline()
+        self.__plotsOutdated    = False
+        self.__plotsRefreshTime = time.time()
+        livePlots = []
+        for kind, parameters, plot, state in self.__livePlots:
+            # drop closed plots and plots of changed analysis parameters
+            if not plot or not plot.IsShown():
+                continue
+            if parameters[:2] != (self.__filesInterval, self.__scedasticityWindowSize):
+                continue
+            if kind == "correlation":
+                correlation = self.__get_correlation()
+                if correlation is not None and correlation is not state:
+                    plot.plot_vector(correlation)
+                    plot.draw()
+                    state = correlation
+            elif kind == "lags":
+                lags = parameters[2]
+                if state[0] == self.__usedDataVersion and state[1] < len(self.__usedData):
+                    curves = self.__extend_lags_correlation(lags, state[1], state[2])
+                    plot.plot_vector(curves, labels=["interval %i"%l for l in lags])
+                    plot.draw()
+                    state = (state[0], len(self.__usedData), curves)
+            else:
+                scedasticity = self.__get_scedasticity()
+                if scedasticity is not None and scedasticity is not state:
+                    plot.update_image(scedasticity, limits=self.__scedasticityLimits, keepView=True)
+                    state = scedasticity
+            livePlots.append( (kind, parameters, plot, state) )
+        self.__livePlots = livePlots
+    
+    def __extend_lags_correlation(self, lags, nrows, curves):
+        # extend lags correlation curves of the first nrows used data rows
+        # with appended used data rows
+        ndata      = len(self.__usedData)
+        start      = max(0, nrows-max(lags))
+        if self.__normalizedData is not None:
+            normalized = self.__normalizedData.data[start:]
+        else:
+            normalized = GET_NORMALIZED_DATA(self.__usedData[start:])
+        extended = np.nan*np.zeros((len(lags), max(ndata-min(lags), 0)))
+        extended[:,:curves.shape[1]] = curves
+        for idx, lag in enumerate(lags):
+            first = max(0, nrows-lag)
+            if first >= ndata-lag:
+                continue
+            extended[idx,first:ndata-lag] = GET_LAGS_CORRELATION(normalized[first-start:], [lag])[0]
+        return extended
+        
     def on_compare_selected_data(self, event):
+        self.__update_pipeline()
         if not len(self.__allData):
             warnings.warn("must load data first.")
             dlg = wx.MessageDialog(self, "must load data first.",
@@ -1387,6 +2483,7 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
         plot.Show()                 
     
     def on_plot_selected_data(self, event):
+        self.__update_pipeline()
         if not len(self.__allData):
             warnings.warn("must load data first.")
             dlg = wx.MessageDialog(self, "must load data first.",
@@ -1403,7 +2500,7 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             dlg.Destroy()
             return
         # vertical stack data
-        data = np.vstack([self.__usedData[idx] for idx in selected])
+        data = np.take(self.__usedData, selected, axis=0)
         # plot data
         plot = PlotFigure(parent=self, title="raw data",
                           plotTitle = "raw data",
@@ -1412,6 +2509,7 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
         plot.Show()
         
     def on_plot_data(self, event):
+        self.__update_pipeline()
         if not len(self.__allData):
             warnings.warn("must load data first.")
             dlg = wx.MessageDialog(self, "must load data first.",
@@ -1426,8 +2524,8 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             result = dlg.ShowModal()
             dlg.Destroy()
             return
-        # vertical stack data
-        data = np.vstack(self.__usedData)
+        # all used data
+        data = self.__usedData
         # plot data
         plot = PlotFigure(parent=self, title="raw data",
                           plotTitle = "raw data",
@@ -1436,6 +2534,7 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
         plot.Show()
     
     def on_compute_correlation(self, event):
+        self.__update_pipeline()
         if not len(self.__allData):
             warnings.warn("must load data first.")
             dlg = wx.MessageDialog(self, "must load data first.",
@@ -1457,45 +2556,264 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             result = dlg.ShowModal()
             dlg.Destroy()
             return
+        lags = self.__correlationLags.values()[0]
+        if lags is None and len(self.__usedData) <= self.__filesInterval:
+            warnings.warn("Number of used data must be bigger than files interval")
+            dlg = wx.MessageDialog(self, "Number of used data must be bigger than files interval.",
+                  "Not enough data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        # plot computed correlation
+        if lags is None and self.__get_correlation() is not None:
+            self.__plot_correlation(self.__filesInterval, None, [self.__correlation])
+            return
+        # compute correlation in a background task
+        data       = self.__usedData
+        interval   = self.__filesInterval
+        normalized = None
+        if self.__normalizedData is not None:
+            normalized = self.__normalizedData.data
+        if lags is None:
+            computeLags = [interval]
+        else:
+            computeLags = lags
+        self.__start_task("Computing correlation", self.__compute_correlation, args=(data, normalized, computeLags), 
+                          onDone = lambda result: self.__on_correlation_computed(data, interval, lags, result),
+                          total  = 2)
+    
+    def on_compute_correlation_matrix(self, event):
+        self.__update_pipeline()
+        if not len(self.__allData):
+            warnings.warn("must load data first.")
+            dlg = wx.MessageDialog(self, "must load data first.",
+                  "No data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        if len(self.__usedData) <= 1:
+            warnings.warn("At least two data set must be loaded")
+            dlg = wx.MessageDialog(self, "At least two data set must be loaded.",
+                  "Not enough data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        # plot computed correlation matrix
+        if self.__correlationMatrix is not None:
+            self.__plot_correlation_matrix(self.__correlationMatrix)
+            return
+        # compute correlation matrix in a background task
+        data       = self.__usedData
+        normalized = None
+        if self.__normalizedData is not None:
+            normalized = self.__normalizedData.data
+        self.__start_task("Computing correlation matrix", self.__compute_correlation_matrix, args=(data, normalized), 
+                          onDone = lambda result: self.__on_correlation_matrix_computed(data, result),
+                          total  = len(data))
+    
+    def __compute_correlation_matrix(self, data, normalized, progress=None):
+        # compute normalized data when not given and correlation matrix.
+        # No analysis state is changed and it can run in a background task.
+        with self.__profiler.measure("correlation matrix", data=data) as measure:
+            if normalized is None:
+                normalized = GET_NORMALIZED_DATA(data)
+            matrix = GET_CORRELATION_MATRIX(normalized, callback=progress)
+            measure.add_array("correlationMatrix", matrix)
+        return normalized, matrix
+    
+    def __on_correlation_matrix_computed(self, data, result):
+        normalized, matrix = result
+        # keep results when used data didn't change while computing
+        if data is self.__usedData and not self.__usedDataOutdated:
+            if self.__normalizedData is None:
+                self.__normalizedData = RowsBuffer(normalized)
+            self.__correlationMatrix = matrix
+        self.__plot_correlation_matrix(matrix)
+    
+    def __plot_correlation_matrix(self, matrix):
+        with self.__profiler.measure("render", correlationMatrix=matrix):
+            plot = PlotFigure(parent=self, title="correlation matrix", 
+                              plotTitle="correlation matrix",
+                              mapOptions=True)
+            plot.plot_image(matrix, extent=(0,100,0,100), axis='on', colormap="jet",
+                            xLabel="number of files", yLabel="number of files")
+            plot.draw()
+        plot.Show()
+        
+    def __get_correlation(self):
+        # return computed correlation, None is returned when data are not enough
+        # or correlation is not computed. Correlation is computed by a background
+        # task only.
+        if len(self.__usedData) <= self.__filesInterval:
+            return None
         if self.__correlation is None:
-            correlation = []
-            self.__progressBar.SetValue(0)  
-            self.__progressBar.SetRange(len(self.__usedData)-1)
-            for idx in range(0,len(self.__usedData)-1, self.__filesInterval):
-                y0 = self.__usedData[idx]
-                y1 = self.__usedData[idx+1]
-                # create correlation vector
-                y0mean = np.mean(y0)
-                y1mean = np.mean(y1)
-                y0_mean = y0-y0mean
-                y1_mean = y1-y1mean
-                numerator = np.sum(y0_mean*y1_mean)
-                denominator = np.sqrt(np.sum(y0_mean**2)*np.sum(y1_mean**2))
-                correlation.append( numerator/denominator )
-                # update bar
-                self.__progressBar.SetValue(idx+1)
-            self.__correlation = np.array(correlation)
-        # reset progress bar
-        self.__progressBar.SetValue(len(self.__usedData)-1)  
-        # plot data
-        plot = PlotFigure(parent=self, title="correlation", plotTitle="correlation interval %i"%self.__filesInterval)
-        plot.plot_vector(self.__correlation)
+            key = self.__get_result_key("correlation", self.__filesInterval)
+            self.__correlation = self.__resultsCache.get(key)
+        return self.__correlation
+    
+    def __compute_correlation(self, data, normalized, lags, progress=None):
+        # compute normalized data when not given and lags correlation curves.
+        # No analysis state is changed and it can run in a background task.
+        if progress is None:
+            progress = lambda done, total: None
+        with self.__profiler.measure("correlation", data=data) as measure:
+            if normalized is None:
+                normalized = GET_NORMALIZED_DATA(data)
+            progress(1, 2)
+            curves = GET_LAGS_CORRELATION(normalized, lags)
+            progress(2, 2)
+            measure.add_array("correlation", curves)
+        return normalized, curves
+    
+    def __on_correlation_computed(self, data, interval, lags, result):
+        normalized, curves = result
+        # keep results when used data and interval didn't change while computing
+        live = data is self.__usedData and not self.__usedDataOutdated
+        if live:
+            if self.__normalizedData is None:
+                self.__normalizedData = RowsBuffer(normalized)
+            if lags is None and interval == self.__filesInterval and self.__correlation is None:
+                self.__correlation = curves[0]
+                self.__resultsCache.set(self.__get_result_key("correlation", interval), self.__correlation, self.__correlation.nbytes)
+        self.__plot_correlation(interval, lags, curves, live=live)
+    
+    def __plot_correlation(self, interval, lags, curves, live=True):
+        # lags curves of used data are extended in live plots, outdated ones aren't
+        with self.__profiler.measure("render", correlation=curves):
+            if lags is None:
+                plot = PlotFigure(parent=self, title="correlation", plotTitle="correlation interval %i"%interval)
+                plot.plot_vector(curves[0])
+                self.__livePlots.append( ("correlation", (interval, self.__scedasticityWindowSize), plot, None) )
+            else:
+                plot = PlotFigure(parent=self, title="correlation", plotTitle="correlation intervals %s"%", ".join([str(l) for l in lags]))
+                plot.plot_vector(curves, labels=["interval %i"%l for l in lags])
+                if live:
+                    state = (self.__usedDataVersion, len(self.__usedData), curves)
+                    self.__livePlots.append( ("lags", (interval, self.__scedasticityWindowSize, tuple(lags)), plot, state) )
+            plot.draw()
         plot.Show()
     
-    def __get_scedasticity_correlation(self, y0, y1, halfwindow):   
-        # create correlation vector
-        corr = np.nan*np.zeros(len(y0))
-        # create positions vector
-        positions = range(halfwindow, len(y0)-halfwindow, 1)
-        # calculate correlations
-        for idx in positions:
-            dotproduct = np.dot(y0[idx-halfwindow:idx+halfwindow+1], y1[idx-halfwindow:idx+halfwindow+1])
-            normy1 = norm(y0[idx-halfwindow:idx+halfwindow+1])
-            normy2 = norm(y1[idx-halfwindow:idx+halfwindow+1])
-            corr[idx] = dotproduct/(normy1*normy2)
-        return corr
+    def __get_result_key(self, *parameters):
+        # analysis results are keyed by all data version, data selection,
+        # formula and analysis parameters which define used data
+        selection = (self.__useFiles.keys()[0], self.__ignoreFiles.keys()[0],
+                     self.__useDataPoints.keys()[0], self.__ignoreDataPoints.keys()[0])
+        return (self.__dataVersion, selection, self.__manipulateDataFormula) + parameters
+    
+    def __get_windowed_norms(self):
+        # every used data row windowed norms of current window size, None is
+        # returned when not computed yet. Norms are computed by scedasticity
+        # tasks and dropped when window or used data change.
+        if self.__windowedNorms is None:
+            return None
+        return self.__windowedNorms.data
+    
+    def __set_windowed_norms(self, data, window, norms):
+        # keep computed norms when used data and window didn't change while computing
+        if norms is None or self.__windowedNorms is not None:
+            return
+        if data is self.__usedData and not self.__usedDataOutdated and window == self.__scedasticityWindowSize:
+            self.__windowedNorms = RowsBuffer(norms)
+        
+    def __get_scedasticity(self):
+        # return computed scedasticity, None is returned when data are not enough
+        # or scedasticity is not computed. Scedasticity is computed by a background
+        # task only.
+        if len(self.__usedData) <= self.__filesInterval:
+            return None
+        if self.__scedasticityWindowSize > self.__usedData.shape[1]:
+            return None
+        if self.__scedasticity is None and not self.__outOfCore:
+            key    = self.__get_result_key("scedasticity", self.__filesInterval, self.__scedasticityWindowSize)
+            cached = self.__resultsCache.get(key)
+            if cached is not None:
+                self.__scedasticity, self.__scedasticityLimits = cached
+                self.__scedasticityBuffer = RowsBuffer(self.__scedasticity)
+        return self.__scedasticity
+        
+    def __compute_scedasticity(self, data, interval, window, norms=None, progress=None):
+        # compute data scedasticity and return map, minimum, maximum, out of
+        # core file path and windowed norms. Norms are computed when not given
+        # except out of core where they are computed by chunks within memory
+        # budget. No analysis state is changed and it can run in a background task.
+        with self.__profiler.measure("scedasticity", data=data) as measure:
+            if norms is None and not self.__outOfCore:
+                norms = GET_WINDOWED_NORMS(data, int(float(window)/2))
+            result = self.__compute_scedasticity_map(data, interval, window, norms=norms, progress=progress)
+            measure.add_array("scedasticity", result[0])
+        return result + (norms,)
         
+    def __compute_scedasticity_map(self, data, interval, window, norms=None, progress=None):
+        halfwindow   = int(float(window)/2)
+        memoryBudget = self.__memoryBudget*1024**2
+        if self.__outOfCore:
+            # raw file without header, appended rows are written at its end
+            fd, path = tempfile.mkstemp(prefix="scedasticity_", suffix=".raw")
+            os.close(fd)
+            shape = (len(data)-interval, data.shape[1])
+            result = None
+            try:
+                out    = np.memmap(path, mode="w+", dtype=np.float32, shape=shape)
+                result = GET_SCEDASTICITY_MAP_CHUNKED(data, interval, halfwindow, out=out, memoryBudget=memoryBudget, norms=norms, callback=progress)
+            finally:
+                if result is None:
+                    # remove file of failed or cancelled computation
+                    out = None
+                    try:
+                        os.remove(path)
+                    except:
+                        pass
+            return result + (path,)
+        if self.__computationWorkers > 1:
+            result = GET_SCEDASTICITY_MAP_PARALLEL(data, interval, halfwindow, workers=self.__computationWorkers, norms=norms, callback=progress)
+        else:
+            result = GET_SCEDASTICITY_MAP_CHUNKED(data, interval, halfwindow, memoryBudget=memoryBudget, norms=norms, callback=progress)
+        return result + (None,)
+    
+    def __set_scedasticity(self, scedasticity, dMin, dMax, path):
+        # set computed scedasticity of current used data and parameters
+        self.__remove_scedasticity_file()
+        self.__scedasticityFile   = path
+        self.__scedasticityLimits = (dMin, dMax)
+        if path is not None:
+            # out of core scedasticity file can't grow
+            self.__scedasticity       = scedasticity
+            self.__scedasticityBuffer = None
+            return
+        self.__scedasticityBuffer = RowsBuffer(scedasticity)
+        self.__scedasticity       = self.__scedasticityBuffer.data
+        key = self.__get_result_key("scedasticity", self.__filesInterval, self.__scedasticityWindowSize)
+        self.__resultsCache.set(key, (self.__scedasticity, self.__scedasticityLimits), self.__scedasticity.nbytes)
+    
+    def __on_scedasticity_computed(self, data, interval, window, result):
+        scedasticity, dMin, dMax, path, norms = result
+        self.__set_windowed_norms(data, window, norms)
+        # keep results when used data and parameters didn't change while computing
+        live = data is self.__usedData and not self.__usedDataOutdated and \
+               interval == self.__filesInterval and window == self.__scedasticityWindowSize
+        if live:
+            self.__set_scedasticity(scedasticity, dMin, dMax, path)
+        self.__plot_scedasticity(interval, window, scedasticity, (dMin, dMax), live=live)
+        if not live and path is not None:
+            # out of core file of outdated scedasticity is not kept
+            try:
+                os.remove(path)
+            except:
+                pass
+    
+    def __plot_scedasticity(self, interval, window, scedasticity, limits, live=True):
+        with self.__profiler.measure("render", scedasticity=scedasticity):
+            plot = PlotFigure(parent=self, title="scedasticity", 
+                              plotTitle="interval %i - window %i"%(interval, window),
+                              mapOptions=True)
+            plot.plot_image(scedasticity, extent=(0,100,0,100), axis='on', colormap="jet", limits=limits)
+            plot.draw()
+        plot.Show()
+        if live:
+            self.__livePlots.append( ("scedasticity", (interval, window), plot, scedasticity) )
+    
     def on_compute_scedasticity(self, event):
+        self.__update_pipeline()
         if not len(self.__allData):
             warnings.warn("must load data first.")
             dlg = wx.MessageDialog(self, "must load data first.",
@@ -1510,34 +2828,162 @@ e.g. np.sin(dataFile) # computes the sin function of all data.",
             result = dlg.ShowModal()
             dlg.Destroy()
             return
+        if len(self.__usedData) <= self.__filesInterval:
+            warnings.warn("Number of used data must be bigger than files interval")
+            dlg = wx.MessageDialog(self, "Number of used data must be bigger than files interval.",
+                  "Not enough data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
         windowSize=float(self.__scedasticityWindowSize)
-        assert windowSize<=len(self.__usedData[0]), "scedasticity size cannot be bigger than the data size"
-        halfwindow = int(windowSize/2)
-        if self.__scedasticity is None:
-            correlation = []
-            self.__progressBar.SetValue(0)  
-            self.__progressBar.SetRange(len(self.__usedData)-self.__filesInterval)
-            for idx in range(0, len(self.__usedData)-self.__filesInterval): 
-                y0 = self.__usedData[idx]
-                y1 = self.__usedData[idx+self.__filesInterval] 
-                correlation.append(self.__get_scedasticity_correlation(y0,y1, halfwindow))
-                # update bar
-                self.__progressBar.SetValue(idx+1)
-            # reset progress bar
-            self.__progressBar.SetValue(len(self.__usedData)-self.__filesInterval)  
-            self.__scedasticity = np.vstack(correlation)
-        # vertical stack data
-        data = np.array( self.__scedasticity )
-        # normalize between 0 and 1
-        data -= np.nanmin( data )
-        data /= np.nanmax( data )
-        # plot data
-        plot = PlotFigure(parent=self, title="scedasticity", 
-                          plotTitle="interval %i - window %i"%(self.__filesInterval, self.__scedasticityWindowSize),
-                          mapOptions=True)
-        plot.plot_image(data, extent=(0,100,0,100), axis='on', colormap="jet")
-        plot.Show()
+        assert windowSize<=self.__usedData.shape[1], "scedasticity size cannot be bigger than the data size"
+        # plot computed scedasticity
+        if self.__get_scedasticity() is not None:
+            self.__plot_scedasticity(self.__filesInterval, self.__scedasticityWindowSize, self.__scedasticity, self.__scedasticityLimits)
+            return
+        # compute scedasticity in a background task, windowed norms are shared by all intervals
+        data     = self.__usedData
+        interval = self.__filesInterval
+        window   = self.__scedasticityWindowSize
+        norms    = self.__get_windowed_norms()
+        self.__start_task("Computing scedasticity", self.__compute_scedasticity, args=(data, interval, window, norms), 
+                          onDone = lambda result: self.__on_scedasticity_computed(data, interval, window, result),
+                          total  = len(data)-interval)
 
+    def on_compute_intervals_cube(self, event):
+        self.__update_pipeline()
+        if not len(self.__allData):
+            warnings.warn("must load data first.")
+            dlg = wx.MessageDialog(self, "must load data first.",
+                  "No data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        intervals = self.__scedasticityIntervals.values()[0]
+        if intervals is None:
+            warnings.warn("must set scedasticity intervals first.")
+            dlg = wx.MessageDialog(self, "must set scedasticity intervals first.",
+                  "No intervals found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        intervals = [i for i in intervals if i<len(self.__usedData)]
+        if not len(intervals):
+            warnings.warn("Number of used data must be bigger than files intervals")
+            dlg = wx.MessageDialog(self, "Number of used data must be bigger than files intervals.",
+                  "Not enough data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        windowSize=float(self.__scedasticityWindowSize)
+        assert windowSize<=self.__usedData.shape[1], "scedasticity size cannot be bigger than the data size"
+        # plot computed intervals cube
+        title = "intervals %s - window %i"%(self.__scedasticityIntervals.keys()[0], self.__scedasticityWindowSize)
+        if self.__intervalsCube is not None and self.__intervalsCube[0] == intervals:
+            self.__plot_intervals_cube(title, intervals, self.__intervalsCube[1])
+            return
+        # compute intervals cube in a background task, windowed norms are shared by all intervals
+        data   = self.__usedData
+        window = self.__scedasticityWindowSize
+        norms  = self.__get_windowed_norms()
+        self.__start_task("Computing intervals cube", self.__compute_intervals_cube, args=(data, intervals, window, norms), 
+                          onDone = lambda result: self.__on_intervals_cube_computed(data, intervals, window, title, result),
+                          total  = len(intervals))
+    
+    def __compute_intervals_cube(self, data, intervals, window, norms, progress=None):
+        # compute windowed norms when not given and scedasticity intervals cube.
+        # No analysis state is changed and it can run in a background task.
+        with self.__profiler.measure("intervals cube", data=data) as measure:
+            if norms is None:
+                norms = GET_WINDOWED_NORMS(data, int(float(window)/2))
+            cube = GET_SCEDASTICITY_INTERVALS_CUBE(data, intervals, int(float(window)/2), norms=norms, callback=progress)
+            measure.add_array("intervalsCube", cube)
+        return norms, cube
+    
+    def __on_intervals_cube_computed(self, data, intervals, window, title, result):
+        norms, cube = result
+        self.__set_windowed_norms(data, window, norms)
+        # keep results when used data and window didn't change while computing
+        if data is self.__usedData and not self.__usedDataOutdated and window == self.__scedasticityWindowSize:
+            self.__intervalsCube = (intervals, cube)
+        self.__plot_intervals_cube(title, intervals, cube)
+    
+    def __plot_intervals_cube(self, title, intervals, cube):
+        with self.__profiler.measure("render", intervalsCube=cube):
+            plot = PlotFigure(parent=self, title="scedasticity intervals cube", 
+                              plotTitle=title, mapOptions=True, cubeOptions=True)
+            plot.plot_cube(cube, labels=["interval %i"%i for i in intervals], 
+                           extent=(0,100,0,100), axis='on', colormap="jet")
+            plot.draw()
+        plot.Show()
+        
+    def on_compute_scale_space(self, event):
+        self.__update_pipeline()
+        if not len(self.__allData):
+            warnings.warn("must load data first.")
+            dlg = wx.MessageDialog(self, "must load data first.",
+                  "No data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        if len(self.__usedData) <= self.__filesInterval:
+            warnings.warn("Number of used data must be bigger than files interval")
+            dlg = wx.MessageDialog(self, "Number of used data must be bigger than files interval.",
+                  "Not enough data found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        windows = self.__scedasticityWindows.values()[0]
+        if windows is None:
+            warnings.warn("must set scedasticity windows first.")
+            dlg = wx.MessageDialog(self, "must set scedasticity windows first.",
+                  "No windows found", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        windows = [w for w in windows if w<=self.__usedData.shape[1]]
+        if not len(windows):
+            warnings.warn("scedasticity windows cannot be bigger than the data size")
+            dlg = wx.MessageDialog(self, "scedasticity windows cannot be bigger than the data size.",
+                  "Wrong windows", wx.OK|wx.ICON_WARNING)
+            result = dlg.ShowModal()
+            dlg.Destroy()
+            return
+        # plot computed scale space
+        title = "interval %i - windows %s"%(self.__filesInterval, self.__scedasticityWindows.keys()[0])
+        if self.__scaleSpace is not None and self.__scaleSpace[0] == windows:
+            self.__plot_scale_space(title, windows, self.__scaleSpace[1])
+            return
+        # compute scale space in a background task
+        data     = self.__usedData
+        interval = self.__filesInterval
+        self.__start_task("Computing scale space", self.__compute_scale_space, args=(data, interval, windows), 
+                          onDone = lambda result: self.__on_scale_space_computed(data, interval, windows, title, result),
+                          total  = len(windows))
+    
+    def __compute_scale_space(self, data, interval, windows, progress=None):
+        # compute scedasticity scale space, no analysis state is changed and
+        # it can run in a background task.
+        with self.__profiler.measure("scale space", data=data) as measure:
+            scaleSpace = GET_SCEDASTICITY_SCALE_SPACE(data, interval, [int(w/2) for w in windows], callback=progress)
+            measure.add_array("scaleSpace", scaleSpace)
+        return scaleSpace
+    
+    def __on_scale_space_computed(self, data, interval, windows, title, scaleSpace):
+        # keep results when used data and interval didn't change while computing
+        if data is self.__usedData and not self.__usedDataOutdated and interval == self.__filesInterval:
+            self.__scaleSpace = (windows, scaleSpace)
+        self.__plot_scale_space(title, windows, scaleSpace)
+    
+    def __plot_scale_space(self, title, windows, scaleSpace):
+        with self.__profiler.measure("render", scaleSpace=scaleSpace):
+            plot = PlotFigure(parent=self, title="scedasticity scale-space", 
+                              plotTitle=title, mapOptions=True, cubeOptions=True)
+            plot.plot_cube(scaleSpace, labels=["window %i"%w for w in windows], 
+                           extent=(0,100,0,100), axis='on', colormap="jet")
+            plot.draw()
+        plot.Show()
+        
     def __update_read_files_parameters(self, comment, delimiter, headerLines, footerLines, useColumn):
         # create comment
         self.__commentWid.ChangeValue(str(comment))